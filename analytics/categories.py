@@ -0,0 +1,72 @@
+"""Per-category data for the category pages (Calm, Energy, ...).
+
+A bundle is one category's slice of the daily rollups: a prefix-sum index
+for its KPIs and daily trend, plus the per-experience rows for its table.
+Every category's bundle is built from one read of the rollups
+(``CategoryBundle.build_all``), the first time a category page is opened
+after new data arrives; the split into categories is then in memory.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analytics import rollups, store
+from analytics.prefix_index import DIMENSIONS, PrefixIndex, _day_number
+from analytics.query import ALL
+from analytics.timings import timings
+
+EXPERIENCE_METRICS = ["sessions", "duration_us", "rating_sum", "rated"]
+
+
+class CategoryBundle:
+    def __init__(self, category, table):
+        """``table`` holds the category's rollup rows (dimensions, experience, day, metrics)."""
+        self.category = category
+        self.index = PrefixIndex(table)
+        self._experiences = pd.DataFrame({
+            **{dim: table[dim].to_numpy(zero_copy_only=False) for dim in DIMENSIONS},
+            "experience": table["experience"].to_numpy(zero_copy_only=False),
+            "day": table["day"].cast(pa.int32()).to_numpy(),
+            **{metric: table[metric].to_numpy(zero_copy_only=False) for metric in EXPERIENCE_METRICS},
+        })
+
+    @classmethod
+    def build_all(cls, rollup_dir=rollups.ROLLUP_DIR, org=None):
+        """{category: bundle} for every category (from ``org``'s rollups only, when given)."""
+        table = rollups.read(list(DIMENSIONS) + ["category", "experience", "day"] + rollups.METRICS, rollup_dir, org)
+        if table is None:
+            schema = pa.schema([(c, pa.string()) for c in DIMENSIONS + ("category", "experience")]
+                               + [("day", pa.date32())] + [(m, pa.int64()) for m in rollups.METRICS])
+            table = schema.empty_table()
+        return {category: cls(category, table.filter(pc.equal(table["category"], category)))
+                for category in store.CATEGORIES}
+
+    def kpis(self, filters):
+        return self.index.kpis(filters)
+
+    def daily(self, filters):
+        """Play count per day (``day``, ``sessions``), for the trend chart."""
+        return self.index.daily(filters, "sessions")
+
+    @timings.timed("categories.experiences")
+    def experiences(self, filters):
+        """Play count, average minutes and average rating of each experience."""
+        rows = self._experiences
+        mask = np.ones(len(rows), dtype=bool)
+        for dim in DIMENSIONS:
+            if getattr(filters, dim) != ALL:
+                mask &= rows[dim].to_numpy() == getattr(filters, dim)
+        if filters.start is not None:
+            mask &= rows["day"].to_numpy() >= _day_number(filters.start)
+        if filters.end is not None:
+            mask &= rows["day"].to_numpy() <= _day_number(filters.end)
+
+        sums = rows[mask].groupby("experience")[EXPERIENCE_METRICS].sum()
+        table = pd.DataFrame({
+            "Experience": sums.index,
+            "Play count": sums["sessions"].to_numpy(),
+            "Average minutes": (sums["duration_us"] / sums["sessions"] / 60_000_000).to_numpy(),
+            "Average rating": (sums["rating_sum"] / sums["rated"].where(sums["rated"] > 0)).to_numpy(),
+        })
+        return table.sort_values("Play count", ascending=False, ignore_index=True)
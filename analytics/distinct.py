@@ -0,0 +1,129 @@
+"""Distinct users and devices for any filter selection.
+
+Unique users can't be added up across days or orgs like play counts, and an
+exact ``nunique`` over every session on each rerun is too slow. Instead each
+org's day of sessions gets a HyperLogLog sketch of its users per (device,
+category), written next to the daily rollups (one file per day, every org
+in it). Sketches are unioned by taking the maximum of each register, so any selection is answered from the sketch
+rows of the days it covers.
+
+Error bound: with ``PRECISION = 12`` (4096 registers) the relative standard
+error is 1.04 / sqrt(4096), about 1.6%, so 95% of estimates are within
+about 3.3% of the exact count. Small counts (up to a few hundred users) use
+linear counting and are usually within one or two of the exact count.
+
+Distinct devices are exact: the device is one of the sketch keys. With a
+Username selected the counts are exact too: the user's devices come from the
+entity index and each is checked for sessions in the date range with the
+prefix index (see ``user_counts``).
+
+Each sketch is stored sparsely, one row per non-empty register, because most
+(day, org, device, category) cells only see a handful of users.
+"""
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from analytics import store
+from analytics.query import ALL
+from analytics.timings import timings
+
+SKETCH_DIR = store.DATA_DIR / "rollups" / "users"
+KEYS = ["org", "device", "category"]
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+RELATIVE_ERROR = 1.04 / np.sqrt(REGISTERS)
+
+
+# --- BUILD ---
+def _bit_length(values):
+    # frexp is exact for integers below 2**53, so split the 64 bits in two halves
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def registers(values):
+    """(register, rank) of every value's 64-bit hash, as NumPy arrays."""
+    hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+    register = (hashes >> np.uint64(64 - PRECISION)).astype(np.int16)
+    rest = hashes << np.uint64(PRECISION)  # the remaining bits, left-aligned
+    rank = np.minimum(64 - _bit_length(rest) + 1, 64 - PRECISION + 1).astype(np.int8)
+    return register, rank
+
+
+def summarise(table, by=()):
+    """Sparse user sketches for one day of sessions: (org, device, category, register, rank).
+
+    ``by`` adds grouping columns, e.g. ``["day"]`` for several days at once.
+    """
+    keys = KEYS + list(by)
+    users = table["user"].combine_chunks()
+    # Hash each distinct user once; most users have several sessions a day
+    encoded = pc.dictionary_encode(users)
+    register, rank = registers(encoded.dictionary.to_numpy(zero_copy_only=False))
+    codes = encoded.indices.to_numpy(zero_copy_only=False)
+    rows = pa.table({
+        **{key: table[key] for key in keys},
+        "register": register[codes],
+        "rank": rank[codes],
+    })
+    grouped = rows.group_by(keys + ["register"]).aggregate([("rank", "max")])
+    return grouped.rename_columns(keys + ["register", "rank"])
+
+
+# --- QUERY ---
+def estimate(dense):
+    """HyperLogLog estimate from a full array of ``REGISTERS`` ranks."""
+    m = float(REGISTERS)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-dense.astype(np.float64)))
+    empty = int(np.count_nonzero(dense == 0))
+    if raw <= 2.5 * m and empty:
+        return m * np.log(m / empty)  # small-range correction (linear counting)
+    return raw
+
+
+def open_sketches(sketch_dir=SKETCH_DIR):
+    if not any(Path(sketch_dir).glob("day=*/users.parquet")):
+        return None
+    return ds.dataset(str(sketch_dir), format="parquet", partitioning=store.DAY_PARTITIONING)
+
+
+def user_counts(filters, entity_index, prefix_index):
+    """Exact counts for a selection of one user, without reading any files.
+
+    The sketches don't keep users apart, and the raw sessions are sorted by
+    device before user, so a scan would read nearly every row group.
+    """
+    devices = entity_index.devices_of(filters.user)
+    if filters.device != ALL:
+        devices = [device for device in devices if device == filters.device]
+    used = sum(prefix_index.totals(replace(filters, device=device))["sessions"] > 0 for device in devices)
+    return {"users": 1 if used else 0, "devices": used}
+
+
+@timings.timed("distinct.counts")
+def counts(filters, entity_index, prefix_index, sketch_dir=SKETCH_DIR):
+    """{"users": ..., "devices": ...} for a filter selection (users estimated).
+
+    The indexes answer selections of one user (see ``user_counts``).
+    """
+    if filters.user != ALL:
+        return user_counts(filters, entity_index, prefix_index)
+
+    dataset = open_sketches(sketch_dir)
+    if dataset is None:
+        return {"users": 0, "devices": 0}
+    table = dataset.to_table(columns=["device", "register", "rank"], filter=filters.expression())
+    if table.num_rows == 0:
+        return {"users": 0, "devices": 0}
+    union = table.group_by("register").aggregate([("rank", "max")])
+    dense = np.zeros(REGISTERS, dtype=np.int8)
+    dense[union["register"].to_numpy()] = union["rank_max"].to_numpy()
+    return {"users": int(round(estimate(dense))), "devices": pc.count_distinct(table["device"]).as_py()}
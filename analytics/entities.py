@@ -0,0 +1,90 @@
+"""Searchable lists of users, organizations and devices for the Filters bar.
+
+Names are kept in sorted NumPy arrays, so a prefix search is two binary
+searches and only the top matches are sent to the browser. Lists can be
+scoped to each other: choosing an organization narrows the devices and users,
+and choosing a device narrows the users.
+"""
+import numpy as np
+import pandas as pd
+
+from analytics import rollups
+from analytics.query import ALL
+from analytics.timings import timings
+
+KINDS = ("org", "device", "user")
+# Which selections narrow which lists, most specific first
+SCOPES = {"user": ("device", "org"), "device": ("org",), "org": ()}
+TYPEAHEAD_LIMIT = 50
+
+
+class SortedNames:
+    """Names sorted case-insensitively, searchable by prefix."""
+
+    def __init__(self, names):
+        names = np.asarray(sorted(set(names), key=str.lower), dtype=str)
+        self.names = names
+        self.keys = np.char.lower(names) if len(names) else names
+
+    def search(self, prefix="", limit=TYPEAHEAD_LIMIT):
+        prefix = prefix.strip().lower()
+        lo = int(self.keys.searchsorted(prefix, "left"))
+        hi = int(self.keys.searchsorted(prefix + "\U0010ffff", "left"))
+        return self.names[lo:min(hi, lo + limit)].tolist()
+
+    def __contains__(self, name):
+        i = int(self.keys.searchsorted(name.lower(), "left"))
+        while i < len(self.keys) and self.keys[i] == name.lower():
+            if self.names[i] == name:
+                return True
+            i += 1
+        return False
+
+
+class EntityIndex:
+    def __init__(self, triples):
+        """Build from a DataFrame of distinct (org, device, user) combinations."""
+        triples = triples.dropna()
+        self._lists = {(kind, None, None): SortedNames(triples[kind]) for kind in KINDS}
+        for kind, scopes in SCOPES.items():
+            for scope in scopes:
+                for value, group in triples.groupby(scope, sort=False)[kind]:
+                    self._lists[(kind, scope, value)] = SortedNames(group)
+        # Every (user, device) pair, sorted by user, for devices_of
+        pairs = triples[["user", "device"]].drop_duplicates().sort_values(["user", "device"])
+        self._pair_users = pairs["user"].to_numpy(dtype=str)
+        self._pair_devices = pairs["device"].to_numpy(dtype=str)
+
+    @classmethod
+    def build(cls, rollup_dir=rollups.ROLLUP_DIR, org=None):
+        """The index of every name (only ``org``'s, when given)."""
+        table = rollups.read(list(KINDS), rollup_dir, org)
+        if table is None:
+            return cls(pd.DataFrame(columns=list(KINDS), dtype=str))
+        distinct = table.group_by(list(KINDS)).aggregate([])
+        return cls(distinct.to_pandas())
+
+    def _names(self, kind, selection):
+        """The list for ``kind`` narrowed by the most specific active selection."""
+        for scope in SCOPES[kind]:
+            value = selection.get(scope, ALL)
+            if value != ALL:
+                return self._lists.get((kind, scope, value), SortedNames([]))
+        return self._lists[(kind, None, None)]
+
+    @timings.timed("entities.search")
+    def search(self, kind, prefix="", limit=TYPEAHEAD_LIMIT, **selection):
+        """Top ``limit`` names of ``kind`` starting with ``prefix``.
+
+        ``selection`` holds the other filters, e.g. ``search("user", "an", org="SwinUniversity")``.
+        """
+        return self._names(kind, selection).search(prefix, limit)
+
+    def contains(self, kind, name, **selection):
+        return name in self._names(kind, selection)
+
+    def devices_of(self, user):
+        """Every device ``user`` has had a session on (two binary searches)."""
+        lo = int(self._pair_users.searchsorted(user, "left"))
+        hi = int(self._pair_users.searchsorted(user, "right"))
+        return self._pair_devices[lo:hi].tolist()
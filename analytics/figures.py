@@ -0,0 +1,173 @@
+"""Plotly figures for the dashboard, built once and shared by every session.
+
+Building a figure with ``px.scatter`` / ``go.Figure`` validates every
+property and takes tens of milliseconds. The same org view opened by many
+admins needs the same figures, so they are kept in a process-wide LRU keyed
+by (chart type, data fingerprint, theme) and bounded by their serialized
+size. Each organization's figures (the ``namespace``) have their own LRU and
+byte budget, so one customer's views can't evict another's. All namespaces
+together stay under ``LIMINAL_FIGURE_TOTAL_MB``: past it, the namespace
+holding the most gives up its least recently used figures first.
+
+Cached figures are shared between sessions: treat them as read-only.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+MAX_BYTES = 16 * 1024 * 1024  # serialized size of one namespace's cached figures
+TOTAL_BYTES = int(os.environ.get("LIMINAL_FIGURE_TOTAL_MB", "256")) * 1024 * 1024  # all namespaces together
+FONT_COLORS = {"dark": "white", "light": "#31333F"}
+
+
+def fingerprint(*parts):
+    """Hash the data a figure is built from (DataFrames are hashed by value)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(",".join(map(str, part.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class FigureCache:
+    def __init__(self, max_bytes=MAX_BYTES, total_bytes=TOTAL_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = total_bytes
+        self._figures = {}  # namespace -> OrderedDict(key -> (figure, serialized size))
+        self._bytes = {}  # namespace -> total serialized size
+        self._lock = threading.Lock()
+
+    def get(self, kind, theme, builder, *args, namespace=None):
+        """Return the cached figure for this data, building it on a miss."""
+        key = (kind, fingerprint(*args), theme)
+        with self._lock:
+            figures = self._figures.get(namespace, {})
+            if key in figures:
+                figures.move_to_end(key)
+                return figures[key][0]
+
+        figure = builder(*args, theme=theme)
+        size = len(figure.to_json())
+        with self._lock:
+            figures = self._figures.setdefault(namespace, OrderedDict())
+            if key not in figures and size <= min(self.max_bytes, self.total_bytes):
+                figures[key] = (figure, size)
+                self._bytes[namespace] = self._bytes.get(namespace, 0) + size
+                # Only this namespace's least recently used figures are evicted
+                while self._bytes[namespace] > self.max_bytes:
+                    self._evict(namespace)
+                while sum(self._bytes.values()) > self.total_bytes:
+                    self._evict(max(self._bytes, key=self._bytes.get))
+        return figure
+
+    def _evict(self, namespace):
+        figures = self._figures[namespace]
+        _, (_, evicted) = figures.popitem(last=False)
+        self._bytes[namespace] -= evicted
+        if not figures:
+            del self._figures[namespace], self._bytes[namespace]
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self._bytes.clear()
+
+
+cache = FigureCache()
+
+
+# --- BUILDERS ---
+def bubble_chart(data, color_map, theme="dark"):
+    """Packed mood bubbles (``data`` has mood, size, x and y columns)."""
+    fig = px.scatter(
+        data, x='x', y='y', size='size', color='mood', text='mood',
+        color_discrete_map=color_map,
+        size_max=60
+    )
+    fig.update_traces(textposition='middle center', textfont=dict(color='white', size=14))
+    # This part cleans up the chart to look like the design
+    fig.update_layout(
+        showlegend=False,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(visible=False),
+        # 'scaleanchor' and 'scaleratio' make the chart a square
+        yaxis=dict(visible=False, scaleanchor="x", scaleratio=1)
+    )
+    return fig
+
+
+def gauge_chart(value, theme="dark"):
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = value,
+        number = {'suffix': "%"},
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Awe Intensity", 'font': {'size': 24}},
+        gauge = {
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "#8A2BE2"},
+        }))
+
+    fig.update_layout(
+        paper_bgcolor = "rgba(0,0,0,0)", # Makes the background transparent
+        font = {'color': FONT_COLORS.get(theme, "white"), 'family': "Arial"}
+    )
+    return fig
+
+
+def donut_chart(category_data, colors, theme="dark"):
+    """Category share donut (``category_data`` has Category and Percentage columns)."""
+    fig = go.Figure(data=[go.Pie(
+        labels=category_data['Category'],
+        values=category_data['Percentage'],
+        hole=.6,
+        marker_colors=colors,
+        textinfo='percent',
+        textfont_size=16,
+        textposition='outside',
+        insidetextorientation='horizontal',
+        hovertemplate="<b>%{label}</b><br>%{percent}<extra></extra>"
+    )])
+
+    # The title is handled by st.markdown on the page
+    fig.update_layout(
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.0,
+            xanchor="center",
+            x=0.5,
+            font=dict(size=16)
+        ),
+        paper_bgcolor="rgba(0,0,0,0)",
+        font = {'color': FONT_COLORS.get(theme, "white"), 'family': "Arial"}
+    )
+    return fig
+
+
+def trend_chart(daily, theme="dark"):
+    """Daily play count line (``daily`` has day and sessions columns)."""
+    fig = go.Figure(go.Scatter(
+        x=daily['day'], y=daily['sessions'], mode='lines+markers',
+        line=dict(color="#8A2BE2", width=3),
+        hovertemplate="%{x}<br>%{y:,} sessions<extra></extra>"
+    ))
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        xaxis=dict(showgrid=False),
+        yaxis=dict(title="Play count", rangemode="tozero"),
+        font = {'color': FONT_COLORS.get(theme, "white"), 'family': "Arial"}
+    )
+    return fig
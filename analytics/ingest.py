@@ -0,0 +1,298 @@
+"""Streaming ingestion of headset session and survey exports.
+
+    python -m analytics.ingest exports/2025-09-01-sessions.jsonl.gz
+    python -m analytics.ingest --kind surveys exports/*-surveys.csv
+
+Files are read record by record through a generator pipeline
+(read -> validate -> dictionary-encode into column batches -> write), so
+memory stays bounded by ``--batch-rows`` however large the export is.
+Records that fail validation are written to ``data/rejects/`` with the reason.
+Survey answers are stored under their session's organization, so sessions
+must be ingested before their surveys. Answers whose session isn't in the
+store yet are rejected, and their file isn't marked as ingested, so running
+it again after the sessions arrive picks them up.
+
+Re-running is safe: each batch is written under a name derived from the
+file's contents (a SHA-256) and the batch number, so a re-run overwrites its
+own files and never another export's (even one with the same name), and
+files already in ``data/_ingested.json`` are skipped (unless ``--force``).
+After sessions are ingested the daily rollups are refreshed for the touched
+days only.
+"""
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analytics import rollups, store
+
+BATCH_ROWS = 100_000
+LEDGER = store.DATA_DIR / "_ingested.json"
+REJECTS_DIR = store.DATA_DIR / "rejects"
+
+# Text columns with few distinct values, interned while a batch is built
+DICTIONARY_COLUMNS = {"user", "org", "device", "experience", "category", "phase", "mood"}
+
+
+# --- READ ---
+def _open_text(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def read_records(path):
+    """Yield (line number, record dict or parse error) from a JSONL or CSV file."""
+    name = str(path).removesuffix(".gz").lower()
+    with _open_text(path) as handle:
+        if name.endswith(".csv"):
+            for number, row in enumerate(csv.DictReader(handle), start=2):
+                yield number, row
+        else:
+            for number, line in enumerate(handle, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as error:
+                    yield number, ValueError(f"invalid JSON: {error}")
+
+
+# --- VALIDATE ---
+def _text(record, field):
+    value = record.get(field)
+    if value is None or str(value).strip() == "":
+        raise ValueError(f"missing {field}")
+    return str(value).strip()
+
+
+def _time(record, field):
+    """ISO 8601 text or epoch seconds; timezone-aware values are stored as UTC."""
+    value = record.get(field)
+    if value is None or value == "":
+        raise ValueError(f"missing {field}")
+    try:
+        if isinstance(value, (int, float)) or str(value).replace(".", "", 1).isdigit():
+            return datetime.fromtimestamp(float(value), timezone.utc).replace(tzinfo=None)
+        parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except (ValueError, TypeError, OverflowError, OSError):  # OSError: out of the platform's time range
+        raise ValueError(f"bad {field}: {value!r}") from None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _score(record, field, low, high):
+    """An optional whole-number answer in [low, high]; None when skipped."""
+    value = record.get(field)
+    if value is None or value == "":
+        return None
+    try:
+        value = int(float(value))
+    except (ValueError, TypeError, OverflowError):  # OverflowError: "inf"
+        raise ValueError(f"bad {field}: {record.get(field)!r}") from None
+    if not low <= value <= high:
+        raise ValueError(f"{field} out of range: {record.get(field)!r}")
+    return value
+
+
+def validate_session(record):
+    row = {field: _text(record, field) for field in ("session_id", "user", "org", "device", "experience", "category")}
+    if row["category"] not in store.CATEGORIES:
+        raise ValueError(f"unknown category {row['category']!r}")
+    row["start"], row["end"] = _time(record, "start"), _time(record, "end")
+    if row["end"] < row["start"]:
+        raise ValueError("session ends before it starts")
+    row["rating"] = _score(record, "rating", 1, 5)
+    row["awe"] = _score(record, "awe", 0, 100)
+    return row
+
+
+def validate_survey(record):
+    row = {field: _text(record, field) for field in ("session_id", "phase", "mood")}
+    row["phase"] = row["phase"].lower()
+    if row["phase"] not in ("pre", "post"):
+        raise ValueError(f"phase must be 'pre' or 'post', not {row['phase']!r}")
+    row["answered_at"] = _time(record, "answered_at")
+    return row
+
+
+KINDS = {
+    "sessions": (store.EVENT_SCHEMA, validate_session, store.write_events),
+    # The org of an answer comes from its session (see with_session_orgs)
+    "surveys": (store.SURVEY_SCHEMA.remove(store.SURVEY_SCHEMA.get_field_index("org")),
+                validate_survey, store.write_surveys),
+}
+
+
+def valid_rows(records, validate, rejects, stats):
+    """Yield validated rows; log the others to ``rejects`` (a text file)."""
+    for number, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("record is not an object")
+            row = validate(record)
+        except ValueError as error:
+            stats["rejected"] += 1
+            raw = None if isinstance(record, Exception) else record
+            rejects.write(json.dumps({"line": number, "error": str(error), "record": raw}, default=str) + "\n")
+        else:
+            stats["rows"] += 1
+            yield row
+
+
+# --- ENCODE ---
+class BatchBuilder:
+    """Collects rows column by column; repeated text is stored once per batch."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.clear()
+
+    def clear(self):
+        self.rows = 0
+        self._columns = {field.name: [] for field in self.schema}
+        self._dictionaries = {name: {} for name in self._columns if name in DICTIONARY_COLUMNS}
+
+    def append(self, row):
+        for name, values in self._columns.items():
+            value = row[name]
+            dictionary = self._dictionaries.get(name)
+            if dictionary is not None:
+                value = dictionary.setdefault(value, len(dictionary))
+            values.append(value)
+        self.rows += 1
+
+    def build(self):
+        arrays = []
+        for field in self.schema:
+            values = self._columns[field.name]
+            if field.name in self._dictionaries:
+                dictionary = pa.array(list(self._dictionaries[field.name]), pa.string())
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(values, pa.int32()), dictionary))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.Table.from_arrays(arrays, names=self.schema.names)
+
+
+def batches(rows, schema, size=BATCH_ROWS):
+    """Group rows into dictionary-encoded Arrow tables of at most ``size`` rows."""
+    builder = BatchBuilder(schema)
+    for row in rows:
+        builder.append(row)
+        if builder.rows >= size:
+            yield builder.build()
+            builder.clear()
+    if builder.rows:
+        yield builder.build()
+
+
+def with_session_orgs(answers, rejects, stats):
+    """Give a batch of answers their sessions' org; reject answers of unknown sessions."""
+    answers = store.attach_orgs(answers)
+    known = pc.is_valid(answers["org"])
+    for record in answers.filter(pc.invert(known)).drop_columns(["org"]).to_pylist():
+        stats["rows"] -= 1
+        stats["rejected"] += 1
+        stats["unknown_sessions"] = stats.get("unknown_sessions", 0) + 1
+        rejects.write(json.dumps({"line": None, "error": "unknown session", "record": record}, default=str) + "\n")
+    return answers.filter(known)
+
+
+# --- WRITE ---
+HASH_CHUNK = 1024 * 1024
+
+
+def source_key(path):
+    """Identify an export by its contents (stable across re-runs and renames)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _read_ledger():
+    try:
+        return json.loads(LEDGER.read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def _write_ledger(ledger):
+    LEDGER.parent.mkdir(parents=True, exist_ok=True)
+    tmp = LEDGER.with_name("_ingested.json.tmp")
+    tmp.write_text(json.dumps(ledger, indent=1, sort_keys=True))
+    os.replace(tmp, LEDGER)
+
+
+def ingest_file(path, kind="sessions", batch_rows=BATCH_ROWS, force=False):
+    """Stream one export into the store. Returns its stats (or None if skipped)."""
+    schema, validate, write = KINDS[kind]
+    key = source_key(path)
+    ledger = _read_ledger()
+    if key in ledger and not force:
+        return None
+
+    stats = {"source": str(path), "kind": kind, "rows": 0, "rejected": 0, "batches": 0}
+    started = time.perf_counter()
+    REJECTS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(REJECTS_DIR / f"{key}.jsonl", "w", encoding="utf-8") as rejects:
+        rows = valid_rows(read_records(path), validate, rejects, stats)
+        for number, table in enumerate(batches(rows, schema, batch_rows)):
+            if kind == "surveys":
+                table = with_session_orgs(table, rejects, stats)
+            write(table, basename=f"ing-{key}-{number:05d}")
+            stats["batches"] += 1
+    if not stats["rejected"]:
+        (REJECTS_DIR / f"{key}.jsonl").unlink()
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    stats["ingested_at"] = datetime.now().isoformat(timespec="seconds")
+    if not stats.get("unknown_sessions"):
+        # Answers whose session wasn't there yet are retried by the next run
+        # (after their sessions are ingested), so the file isn't marked done
+        ledger = _read_ledger()
+        ledger[key] = stats
+        _write_ledger(ledger)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream headset exports (JSONL/CSV, optionally gzipped) into the store.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--kind", choices=sorted(KINDS), default="sessions")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--force", action="store_true", help="re-ingest files already in the ledger")
+    args = parser.parse_args(argv)
+
+    ingested = 0
+    for path in args.files:
+        stats = ingest_file(path, args.kind, args.batch_rows, args.force)
+        if stats is None:
+            print(f"{path}: already ingested, skipped")
+            continue
+        ingested += 1
+        print(f"{path}: {stats['rows']:,} rows in {stats['batches']} batch(es), "
+              f"{stats['rejected']:,} rejected, {stats['seconds']}s")
+        if stats.get("unknown_sessions"):
+            print(f"  {stats['unknown_sessions']:,} answers have no session in the store yet; "
+                  "ingest their sessions and run this again")
+
+    if ingested and args.kind == "sessions":
+        days = rollups.refresh()
+        print(f"Refreshed rollups for {len(days)} day(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Before/after mood shifts from the pre- and post-session surveys.
+
+Survey answers are joined to their sessions once per data version: every
+answer is resolved to the row of its session (one hash lookup over the
+session ids) and the text columns are turned into integer codes. Answering
+the Filters bar is then a few NumPy masks over the sessions and one
+``bincount`` over the answers, which stays well under a second for tens of
+millions of answers.
+
+Only sessions with both a "pre" and a "post" survey are counted, so the two
+distributions describe the same sessions.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analytics import bubbles, store
+from analytics.query import ALL
+from analytics.timings import timings
+
+# The color of each mood's bubble: green/yellow moods are positive and
+# red/blue ones negative
+MOOD_COLORS = {
+    "Calm": "#2ca02c", "Excited": "#98df8a", "Relax": "#55a630", "Cheerful": "#80b918", "Rested": "#aacc00",
+    "Anxious": "#d62728", "Irritated": "#ff6b6b", "Bored": "#c44536", "Pain": "#8d0801",
+    "Sad": "#1f77b4",
+    "Focus": "#ffc300", "Mental vitality": "#ffd60a"
+}
+POSITIVE_MOODS = ("Calm", "Excited", "Relax", "Cheerful", "Rested", "Focus", "Mental vitality")
+NEGATIVE_MOODS = ("Anxious", "Irritated", "Pain", "Bored", "Sad")
+PHASES = ("pre", "post")
+
+
+@dataclass
+class MoodShift:
+    sessions: int  # sessions with both surveys
+    before: pd.DataFrame  # mood, size (number of answers)
+    after: pd.DataFrame
+    positive_change: float = None  # % change in positive answers, None without a baseline
+    negative_change: float = None
+
+
+def _codes(column):
+    """Dictionary-encode a string column into (int32 codes, list of values)."""
+    encoded = pc.dictionary_encode(column.combine_chunks())
+    return encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32), encoded.dictionary.to_pylist()
+
+
+def _day_number(day):
+    return int(np.datetime64(day, "D").astype(np.int64))
+
+
+def _change(before, after):
+    return 100.0 * (after - before) / before if before else None
+
+
+def with_positions(distribution, chart, namespace=None):
+    """Add the packed bubble positions (``x``, ``y``) to a mood distribution.
+
+    Layouts are cached by the data (per ``namespace``), so this only packs
+    again when the sizes actually change.
+    """
+    positions = bubbles.layout(chart, distribution["mood"], distribution["size"], namespace=namespace)
+    return distribution.assign(x=positions["x"].to_numpy(), y=positions["y"].to_numpy())
+
+
+class MoodIndex:
+    def __init__(self, sessions, answers):
+        """Join survey ``answers`` (session_id, phase, mood) to ``sessions``
+        (session_id, user, org, device, day)."""
+        self._dimensions = {}  # column -> (codes per session, {value: code})
+        for column in ("user", "org", "device"):
+            codes, values = _codes(sessions[column])
+            self._dimensions[column] = (codes, {value: code for code, value in enumerate(values)})
+        self._days = sessions["day"].cast(pa.int32()).to_numpy()
+
+        # The join: the session row of every answer (-1 when the session is unknown)
+        rows = pc.index_in(answers["session_id"], value_set=sessions["session_id"].combine_chunks())
+        rows = rows.fill_null(-1).to_numpy().astype(np.int64)
+        phase = pc.index_in(answers["phase"], value_set=pa.array(PHASES)).fill_null(-1).to_numpy()
+        moods, self.moods = _codes(answers["mood"])
+        known = (rows >= 0) & (phase >= 0)
+        rows, phase, moods = rows[known], phase[known], moods[known]
+
+        # A session counts only when it has answers for both phases
+        self._paired = np.zeros(len(self._days), dtype=bool)
+        has_pre = np.zeros(len(self._days), dtype=bool)
+        has_pre[rows[phase == 0]] = True
+        self._paired[rows[phase == 1]] = True
+        self._paired &= has_pre
+
+        # Answers in session order make the per-query gather a sequential read
+        order = np.argsort(rows, kind="stable")
+        self._rows = rows[order]
+        self._keys = (moods.astype(np.intp) * 2 + phase)[order]  # (mood, phase) bucket of every answer
+        self._positive = np.isin(self.moods, POSITIVE_MOODS)
+        self._negative = np.isin(self.moods, NEGATIVE_MOODS)
+
+    @classmethod
+    def build(cls, events_dir=store.EVENTS_DIR, surveys_dir=store.SURVEYS_DIR, org=None):
+        """The index of every answer (only ``org``'s sessions and answers, when given)."""
+        events = store.open_dataset(events_dir, org=org)
+        surveys = store.open_dataset(surveys_dir, store.SURVEY_SCHEMA, org=org)
+        session_columns = ["session_id", "user", "org", "device", "day"]
+        if events is None:
+            sessions = pa.schema([(c, pa.string()) for c in session_columns[:-1]] + [("day", pa.date32())]).empty_table()
+        else:
+            sessions = events.to_table(columns=session_columns)
+        if surveys is None:
+            answers = pa.schema([(c, pa.string()) for c in ("session_id", "phase", "mood")]).empty_table()
+        else:
+            answers = surveys.to_table(columns=["session_id", "phase", "mood"])
+        return cls(sessions, answers)
+
+    def _session_mask(self, filters):
+        mask = self._paired.copy()
+        for column, (codes, lookup) in self._dimensions.items():
+            value = getattr(filters, column)
+            if value != ALL:
+                mask &= codes == lookup.get(value, -1)
+        if filters.start is not None:
+            mask &= self._days >= _day_number(filters.start)
+        if filters.end is not None:
+            mask &= self._days <= _day_number(filters.end)
+        return mask
+
+    @timings.timed("moods.shift")
+    def shift(self, filters):
+        """Mood distributions before and after, for the sessions the filters select."""
+        mask = self._session_mask(filters)
+        counts = np.bincount(self._keys[mask[self._rows]], minlength=2 * len(self.moods))
+        before, after = counts[0::2], counts[1::2]
+
+        def distribution(sizes):
+            frame = pd.DataFrame({"mood": self.moods, "size": sizes})
+            frame = frame[frame["size"] > 0]
+            return frame.sort_values("size", ascending=False, kind="stable").reset_index(drop=True)
+
+        return MoodShift(
+            sessions=int(mask.sum()),
+            before=distribution(before),
+            after=distribution(after),
+            positive_change=_change(int(before[self._positive].sum()), int(after[self._positive].sum())),
+            negative_change=_change(int(before[self._negative].sum()), int(after[self._negative].sum())),
+        )
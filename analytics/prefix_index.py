@@ -0,0 +1,110 @@
+"""Prefix-sum index for the additive KPIs.
+
+For every combination of the Username / Organization / Device ID filters
+(including "All") the index keeps the days that had sessions and a running
+total of each rollup metric. Any date range is then two binary searches and a
+subtraction, so dragging the date picker never scans data.
+"""
+import itertools
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from analytics import rollups
+from analytics.query import ALL
+from analytics.timings import timings
+
+DIMENSIONS = ("user", "org", "device")
+EPOCH = date(1970, 1, 1)
+
+
+def _day_number(day):
+    return (day - EPOCH).days
+
+
+class PrefixIndex:
+    def __init__(self, table):
+        """Build the index from rollup rows (dimensions, ``day`` and metrics)."""
+        frame = pd.DataFrame({dim: table[dim].to_numpy(zero_copy_only=False) for dim in DIMENSIONS})
+        frame["day"] = table["day"].cast(pa.int32()).to_numpy()
+        for metric in rollups.METRICS:
+            frame[metric] = table[metric].to_numpy(zero_copy_only=False)
+
+        self._slices = {}  # (user, org, device) with None for "All" -> rows [lo, hi)
+        days, values, offset = [], [], 0
+        for used in itertools.product((False, True), repeat=len(DIMENSIONS)):
+            columns = [dim for dim, on in zip(DIMENSIONS, used) if on]
+            grouped = (frame.groupby(columns + ["day"], sort=True, dropna=False)[rollups.METRICS]
+                       .sum().reset_index())
+            if grouped.empty:
+                continue
+
+            # Rows are sorted by key then day; find where each key's run starts
+            if columns:
+                keys = grouped[columns]
+                starts = np.flatnonzero(keys.ne(keys.shift()).any(axis=1).to_numpy())
+            else:
+                starts = np.array([0])
+            ends = np.append(starts[1:], len(grouped))
+            key_values = [grouped[dim].to_numpy()[starts] if on else itertools.repeat(None)
+                          for dim, on in zip(DIMENSIONS, used)]
+            for key, lo, hi in zip(zip(*key_values), starts, ends):
+                self._slices[key] = (offset + int(lo), offset + int(hi))
+
+            days.append(grouped["day"].to_numpy(np.int32))
+            values.append(grouped[rollups.METRICS].to_numpy(np.int64))
+            offset += len(grouped)
+
+        self._days = np.concatenate(days) if days else np.empty(0, np.int32)
+        metrics = np.vstack(values) if values else np.empty((0, len(rollups.METRICS)), np.int64)
+        # _cumulative[i] is the sum of all rows before row i, so a slice sum is a subtraction
+        self._cumulative = np.vstack([np.zeros((1, len(rollups.METRICS)), np.int64), metrics.cumsum(axis=0)])
+
+    @classmethod
+    def build(cls, rollup_dir=rollups.ROLLUP_DIR, org=None):
+        """The index of every rollup row (only ``org``'s, when given)."""
+        table = rollups.read(list(DIMENSIONS) + ["day"] + rollups.METRICS, rollup_dir, org)
+        if table is None:
+            schema = pa.schema([(c, pa.string()) for c in DIMENSIONS] + [("day", pa.date32())]
+                               + [(m, pa.int64()) for m in rollups.METRICS])
+            return cls(schema.empty_table())
+        return cls(table)
+
+    def _rows(self, filters):
+        """The [first, last) index rows for the selection and date range, or None."""
+        key = tuple(None if getattr(filters, dim) == ALL else getattr(filters, dim) for dim in DIMENSIONS)
+        span = self._slices.get(key)
+        if span is None:
+            return None
+        lo, hi = span
+        days = self._days[lo:hi]
+        first = lo if filters.start is None else lo + int(days.searchsorted(_day_number(filters.start), "left"))
+        last = hi if filters.end is None else lo + int(days.searchsorted(_day_number(filters.end), "right"))
+        return (first, last) if first < last else None
+
+    def totals(self, filters):
+        """Sum of every rollup metric for the filter selection and date range."""
+        rows = self._rows(filters)
+        if rows is None:
+            return dict.fromkeys(rollups.METRICS, 0)
+        first, last = rows
+        return dict(zip(rollups.METRICS, (self._cumulative[last] - self._cumulative[first]).tolist()))
+
+    @timings.timed("prefix_index.daily")
+    def daily(self, filters, metric="sessions"):
+        """One metric per day for the selection (days without sessions are left out)."""
+        rows = self._rows(filters)
+        if rows is None:
+            return pd.DataFrame({"day": pd.Series(dtype="datetime64[s]"), metric: pd.Series(dtype="int64")})
+        first, last = rows
+        column = rollups.METRICS.index(metric)
+        return pd.DataFrame({
+            "day": self._days[first:last].astype("datetime64[D]"),
+            metric: np.diff(self._cumulative[first:last + 1, column]),
+        })
+
+    @timings.timed("prefix_index.kpis")
+    def kpis(self, filters):
+        return rollups.kpis_from_totals(self.totals(filters))
@@ -0,0 +1,79 @@
+"""The Filters bar's selection, as used by the indexes, caches and reads.
+
+``Filters.expression()`` turns it into one Arrow dataset expression for the
+reads that still go to Parquet (the distinct-count sketches and the batch
+reports): the date range prunes whole ``day=`` partitions and the other
+columns are checked against row-group statistics. ``Filters.scope()`` names
+the organization whose files hold every selected row.
+"""
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+
+import pyarrow.dataset as ds
+
+ALL = "All"
+
+
+@dataclass(frozen=True)
+class Filters:
+    """The values of the Filters bar. "All" (or no date) means "don't filter"."""
+    user: str = ALL
+    org: str = ALL
+    device: str = ALL
+    start: date = None
+    end: date = None
+
+    def between(self, start, end):
+        """Same user/org/device selection over a different date range."""
+        return replace(self, start=start, end=end)
+
+    def last_month(self, today=None):
+        today = today or date.today()
+        return self.between(today - timedelta(days=30), today)
+
+    def scope(self):
+        """The organization whose files hold every selected session (None: all of them)."""
+        return None if self.org == ALL else self.org
+
+    def key(self):
+        """The whole selection, normalised, as a hashable cache key.
+
+        Every field is in it, so two selections only share a key (and a cached
+        result) when they select exactly the same sessions.
+        """
+        names = tuple(getattr(self, column) or ALL for column in ("user", "org", "device"))
+        days = tuple(None if day is None else date.fromordinal(day.toordinal()) for day in (self.start, self.end))
+        return names + days
+
+    def expression(self):
+        """Build the pushdown predicate, or None when nothing is filtered."""
+        conditions = []
+        if self.start is not None:
+            conditions.append(ds.field("day") >= self.start)
+        if self.end is not None:
+            conditions.append(ds.field("day") <= self.end)
+        for column in ("user", "org", "device"):
+            value = getattr(self, column)
+            if value != ALL:
+                conditions.append(ds.field(column) == value)
+        if not conditions:
+            return None
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        return expression
+
+
+def date_range(value):
+    """Normalise the value of ``st.date_input`` to a (start, end) pair.
+
+    While the admin is still picking, the widget returns a single date; treat
+    that as a one-day range.
+    """
+    if isinstance(value, (tuple, list)):
+        if len(value) == 0:
+            return None, None
+        if len(value) == 1:
+            return value[0], value[0]
+        return value[0], value[1]
+    return value, value
@@ -0,0 +1,198 @@
+"""Query results shared by every session of the server, computed once per key.
+
+After the monthly review email a whole client team opens the dashboard at
+the same moment, and their sessions ask for the same org/date aggregates.
+Results are kept in a process-wide cache keyed by (query, data version,
+filter selection), with a TTL. A request for a key that is already being
+computed waits for that computation instead of starting its own (single
+flight).
+
+The key always holds the whole normalised selection (``Filters.key()``):
+user, org, device and dates. A result is only ever handed to a session that
+asked for exactly the same selection, so one client's results can't show up
+under another client's filters.
+
+Each organization (the ``namespace``, by default the selection's org) has
+its own LRU with its own memory budget and entry limit: when one is full
+only its own least recently used results are evicted, so a large customer
+browsing many selections can't push the other customers' results out.
+Budgets are set with ``LIMINAL_CACHE_MB`` (every organization) and
+``LIMINAL_CACHE_BUDGETS`` ("Acme=128,Tiny=4", in MB, for the ones that need
+more or less). All namespaces together stay under ``LIMINAL_CACHE_TOTAL_MB``:
+past it, the namespace using the largest share of its own budget gives up its
+least recently used results first.
+
+Cached results are shared between sessions: treat them as read-only.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+import pandas as pd
+
+TTL = 300  # seconds a result is kept (new data changes the version, and so the key, anyway)
+MAX_ENTRIES = 2048  # per namespace
+MB = 1024 * 1024
+BUDGET_BYTES = int(os.environ.get("LIMINAL_CACHE_MB", "32")) * MB  # estimated size of one namespace's results
+TOTAL_BYTES = int(os.environ.get("LIMINAL_CACHE_TOTAL_MB", "512")) * MB  # all namespaces together
+
+
+def parse_budgets(text):
+    """{org: bytes} from a setting like "Acme=128,Tiny=4" (MB)."""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        org, _, megabytes = item.rpartition("=")
+        if not org or not megabytes.strip().isdigit():
+            raise ValueError(f"bad cache budget {item!r}, expected ORG=MB")
+        budgets[org.strip()] = int(megabytes) * MB
+    return budgets
+
+
+BUDGETS = parse_budgets(os.environ.get("LIMINAL_CACHE_BUDGETS", ""))
+
+
+class _Flight:
+    """A computation in progress; other requests for its key wait on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def _size(value):
+    """Rough size in bytes of a cached result (frames, arrays and what holds them)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size(k) + _size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size(item) for item in value)
+    if is_dataclass(value):
+        return sys.getsizeof(value) + sum(_size(getattr(value, f.name)) for f in fields(value))
+    return sys.getsizeof(value)
+
+
+class _Namespace:
+    """One organization's results, in least recently used order."""
+
+    def __init__(self):
+        self.results = OrderedDict()  # key -> (expires at, value, size)
+        self.bytes = 0
+
+    def pop(self, key):
+        _, _, size = self.results.pop(key)
+        self.bytes -= size
+
+
+class QueryCache:
+    def __init__(self, ttl=TTL, max_entries=MAX_ENTRIES, budget_bytes=BUDGET_BYTES,
+                 budgets=BUDGETS, total_bytes=TOTAL_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.budget_bytes = budget_bytes
+        self.total_bytes = total_bytes
+        self._budgets = dict(budgets)  # namespace -> bytes, for the ones that don't use the default
+        self._namespaces = {}  # namespace -> _Namespace
+        self._bytes = 0  # all namespaces
+        self._flights = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.waits = 0
+
+    def _budget(self, namespace):
+        return self._budgets.get(namespace, self.budget_bytes)
+
+    def get(self, name, version, filters, compute, namespace=None):
+        """``compute(filters)``, or its cached result for this query, version and selection.
+
+        The result is stored under ``namespace`` (default: the selection's org).
+        """
+        namespace = filters.org if namespace is None else namespace
+        key = (namespace, name, str(version), filters.key())
+        with self._lock:
+            space = self._namespaces.get(namespace)
+            cached = space.results.get(key) if space is not None else None
+            if cached is not None and cached[0] > time.monotonic():
+                space.results.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.waits += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute(filters)
+        except BaseException as error:
+            flight.error = error  # not cached: the next request tries again
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._store(namespace, key, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def _store(self, namespace, key, value):
+        now = time.monotonic()
+        size = _size(value)
+        budget = self._budget(namespace)
+        if size > min(budget, self.total_bytes):
+            return  # would evict the whole namespace for one result
+        space = self._namespaces.setdefault(namespace, _Namespace())
+        if key in space.results:
+            self._pop(space, key)
+        space.results[key] = (now + self.ttl, value, size)
+        space.bytes += size
+        self._bytes += size
+        self._trim(space, budget, now)
+        # Over the total, the namespace furthest into its own budget gives way
+        while self._bytes > self.total_bytes:
+            name, fullest = max(self._namespaces.items(), key=lambda item: item[1].bytes / self._budget(item[0]))
+            self._pop(fullest, next(iter(fullest.results)))
+            if not fullest.results:
+                del self._namespaces[name]
+
+    def _pop(self, space, key):
+        size = space.results[key][2]
+        space.pop(key)
+        self._bytes -= size
+
+    def _trim(self, space, budget, now):
+        if len(space.results) <= self.max_entries and space.bytes <= budget:
+            return
+        # When full, expired entries go first, then the least recently used
+        # ones, all from this namespace only
+        for stale in [k for k, (expires, _, _) in space.results.items() if expires <= now]:
+            self._pop(space, stale)
+        while len(space.results) > self.max_entries or space.bytes > budget:
+            self._pop(space, next(iter(space.results)))
+
+    def usage(self):
+        """{namespace: (entries, estimated bytes)}."""
+        with self._lock:
+            return {namespace: (len(space.results), space.bytes) for namespace, space in self._namespaces.items()}
+
+    def clear(self):
+        with self._lock:
+            self._namespaces.clear()
+            self._bytes = 0
+
+
+cache = QueryCache()
@@ -0,0 +1,272 @@
+"""The admin registry of organizations, users and headsets (SQLite).
+
+    python -m analytics.registry --kind device headsets.csv
+    python -m analytics.registry --kind user users.csv
+
+Backs the Manage page. Every listing is one indexed range query:
+
+- search is a case-insensitive name prefix (like the Filters bar), answered
+  from the ``name`` index (``COLLATE NOCASE``)
+- pages are keyset-paginated: a page starts after the last name of the page
+  before (``name > ?``), so page 1,000 is as fast as page 1 and only one
+  page of rows is ever read
+
+CSV imports add or update rows (matched by name) in batches of
+``BATCH_ROWS``, one transaction per batch. Rows that fail validation are
+skipped and reported with their line number. Organizations and users a row
+refers to are created when they don't exist yet.
+
+A customer admin's listings and imports are limited to their own
+organization (``org=``): rows of other organizations are neither listed nor
+written, and names another organization already uses are rejected.
+
+CSV columns (like the event columns):
+
+- org: ``org``
+- user: ``user``, ``org``, optional ``email``
+- device: ``device``, ``org``, optional ``model`` and ``user``
+"""
+import argparse
+import csv
+import sqlite3
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+from analytics import store
+
+DB_PATH = store.DATA_DIR / "registry.sqlite3"
+BATCH_ROWS = 1_000
+PAGE_SIZES = (25, 50, 100)
+MAX_ERRORS = 20  # reported per import
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orgs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    org_id INTEGER NOT NULL REFERENCES orgs (id),
+    email TEXT
+);
+CREATE INDEX IF NOT EXISTS users_org ON users (org_id, name);
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    org_id INTEGER NOT NULL REFERENCES orgs (id),
+    model TEXT,
+    user_id INTEGER REFERENCES users (id),
+    added_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS devices_org ON devices (org_id, name);
+"""
+
+# What a listing shows for each kind (the first column is the table's name)
+LISTINGS = {
+    "org": """
+        SELECT t.name AS "Organization",
+               (SELECT count(*) FROM users WHERE org_id = t.id) AS "Users",
+               (SELECT count(*) FROM devices WHERE org_id = t.id) AS "Headsets"
+        FROM orgs t""",
+    "user": """
+        SELECT t.name AS "Username", o.name AS "Organization", t.email AS "Email"
+        FROM users t JOIN orgs o ON o.id = t.org_id""",
+    "device": """
+        SELECT t.name AS "Device ID", o.name AS "Organization", t.model AS "Model",
+               u.name AS "Assigned user", t.added_at AS "Added"
+        FROM devices t JOIN orgs o ON o.id = t.org_id LEFT JOIN users u ON u.id = t.user_id""",
+}
+TABLES = {"org": "orgs", "user": "users", "device": "devices"}
+
+_ORG = "INSERT INTO orgs (name) VALUES (?) ON CONFLICT (name) DO NOTHING"
+_USER_STUB = ("INSERT INTO users (name, org_id) SELECT ?, id FROM orgs WHERE name = ? "
+              "ON CONFLICT (name) DO NOTHING")
+UPSERTS = {
+    "org": [(_ORG, ("org",))],
+    "user": [
+        (_ORG, ("org",)),
+        ("INSERT INTO users (name, org_id, email) SELECT ?, id, ? FROM orgs WHERE name = ? "
+         "ON CONFLICT (name) DO UPDATE SET org_id = excluded.org_id, email = excluded.email",
+         ("user", "email", "org")),
+    ],
+    "device": [
+        (_ORG, ("org",)),
+        (_USER_STUB, ("user", "org")),
+        ("INSERT INTO devices (name, org_id, model, user_id) "
+         "SELECT ?, id, ?, (SELECT id FROM users WHERE name = ? AND org_id = orgs.id) FROM orgs WHERE name = ? "
+         "ON CONFLICT (name) DO UPDATE SET org_id = excluded.org_id, model = excluded.model, "
+         "user_id = excluded.user_id",
+         ("device", "model", "user", "org")),
+    ],
+}
+
+
+# --- CONNECTION ---
+_ready = set()  # databases whose schema has been created by this process
+
+
+@contextmanager
+def connect(path=DB_PATH):
+    """A connection to the registry (one per call; SQLite opens in microseconds)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(path, timeout=30)) as connection:
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA foreign_keys = ON")
+        if path not in _ready:
+            # WAL lets the pages keep reading while an import writes
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript(SCHEMA)
+            _ready.add(path)
+        yield connection
+
+
+# --- LISTINGS ---
+def _prefix_condition(prefix):
+    # A range on the NOCASE index, like SortedNames.search in analytics/entities.py
+    prefix = prefix.strip()
+    return "t.name >= ? AND t.name < ?", [prefix, prefix + "\U0010ffff"]
+
+
+def _condition(kind, prefix, org):
+    condition, params = _prefix_condition(prefix)
+    if org is not None:
+        # (org_id, name) is indexed, so this stays one range scan
+        condition += " AND t.name = ?" if kind == "org" else " AND t.org_id = (SELECT id FROM orgs WHERE name = ?)"
+        params.append(org)
+    return condition, params
+
+
+def page(kind, prefix="", after=None, limit=PAGE_SIZES[0], path=DB_PATH, org=None):
+    """One page of ``kind`` rows whose name starts with ``prefix``, in name order.
+
+    ``org`` limits the rows to one organization. Returns (rows as dicts, the
+    ``after`` value of the next page or None on the last page).
+    """
+    condition, params = _condition(kind, prefix, org)
+    if after is not None:
+        condition += " AND t.name > ?"
+        params.append(after)
+    sql = f"{LISTINGS[kind]} WHERE {condition} ORDER BY t.name LIMIT ?"
+    with connect(path) as connection:
+        rows = [dict(row) for row in connection.execute(sql, params + [limit + 1])]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, next(iter(rows[-1].values()))
+
+
+def count(kind, prefix="", path=DB_PATH, org=None):
+    """Number of ``kind`` rows whose name starts with ``prefix`` (counted on the index)."""
+    condition, params = _condition(kind, prefix, org)
+    with connect(path) as connection:
+        return connection.execute(f"SELECT count(*) FROM {TABLES[kind]} t WHERE {condition}", params).fetchone()[0]
+
+
+# --- IMPORT ---
+def _text(record, field, required=True):
+    value = (record.get(field) or "").strip()
+    if required and not value:
+        raise ValueError(f"missing {field}")
+    return value or None
+
+
+def validate(kind, record):
+    row = {kind: _text(record, kind)}
+    if kind != "org":
+        row["org"] = _text(record, "org")
+    if kind == "user":
+        row["email"] = _text(record, "email", required=False)
+        if row["email"] and "@" not in row["email"]:
+            raise ValueError(f"bad email: {row['email']!r}")
+    if kind == "device":
+        row["model"] = _text(record, "model", required=False)
+        row["user"] = _text(record, "user", required=False)
+    return row
+
+
+def _taken(connection, kind, rows, org):
+    """The (casefolded) names in ``rows`` that another organization already has."""
+    if kind == "org":
+        return set()
+    names = [row[kind] for row in rows]
+    placeholders = ", ".join("?" * len(names))
+    found = connection.execute(
+        f"SELECT t.name FROM {TABLES[kind]} t JOIN orgs o ON o.id = t.org_id "
+        f"WHERE t.name IN ({placeholders}) AND o.name != ?", names + [org])
+    return {name.casefold() for (name,) in found}
+
+
+def _write_batch(connection, kind, rows):
+    with connection:  # one transaction per batch
+        for sql, fields in UPSERTS[kind]:
+            # Each statement writes the name in its first field (e.g. no user
+            # is created for a headset that isn't assigned to anyone)
+            params = [tuple(row[field] for field in fields) for row in rows if row[fields[0]]]
+            connection.executemany(sql, params)
+
+
+def import_csv(kind, lines, batch_rows=BATCH_ROWS, path=DB_PATH, org=None):
+    """Add or update ``kind`` rows from CSV text (any iterable of lines).
+
+    With ``org`` only that organization's rows are written. Returns
+    {"rows": written, "rejected": skipped, "errors": ["line N: reason", ...]}.
+    """
+    stats = {"rows": 0, "rejected": 0, "errors": []}
+
+    def reject(number, reason):
+        stats["rejected"] += 1
+        if len(stats["errors"]) < MAX_ERRORS:
+            stats["errors"].append(f"line {number}: {reason}")
+
+    def write(connection, batch):
+        if org is not None:
+            taken = _taken(connection, kind, [row for _, row in batch], org)
+            for number, row in batch:
+                if row[kind].casefold() in taken:
+                    reject(number, f"{row[kind]!r} belongs to another organization")
+            batch = [(number, row) for number, row in batch if row[kind].casefold() not in taken]
+        _write_batch(connection, kind, [row for _, row in batch])
+        stats["rows"] += len(batch)
+
+    reader = csv.DictReader(lines)
+    if kind not in (reader.fieldnames or []):
+        raise ValueError(f"the CSV needs a {kind!r} column (found: {', '.join(reader.fieldnames or []) or 'nothing'})")
+    with connect(path) as connection:
+        batch = []  # (line number, row)
+        for number, record in enumerate(reader, start=2):
+            try:
+                row = validate(kind, record)
+            except ValueError as error:
+                reject(number, error)
+                continue
+            if org is not None and (row.get("org") or row[kind]).casefold() != org.casefold():
+                reject(number, f"not in {org}")
+                continue
+            batch.append((number, row))
+            if len(batch) >= batch_rows:
+                write(connection, batch)
+                batch = []
+        if batch:
+            write(connection, batch)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import organizations, users or headsets into the registry.")
+    parser.add_argument("files", nargs="+", type=Path, help="CSV files")
+    parser.add_argument("--kind", choices=list(TABLES), default="device")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    for file in args.files:
+        with open(file, encoding="utf-8", newline="") as handle:
+            stats = import_csv(args.kind, handle, path=args.db)
+        print(f"{file}: {stats['rows']:,} rows, {stats['rejected']:,} rejected")
+        for error in stats["errors"]:
+            print(f"  {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""PDF reports for the "Export Report PDF" button.
+
+Reports are rendered by a small worker pool, off the Streamlit script thread,
+because turning Plotly charts into images is slow. Each report is identified
+by a hash of (page, filters, data version, date) and kept on disk under
+``data/reports/``, so exporting the same view again the same day is instant.
+
+Needs fpdf2, plus kaleido (and Chrome) for the charts. When charts can't be
+rendered, the report still has the KPIs and says which charts are missing.
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+
+from analytics import store
+
+REPORT_DIR = store.DATA_DIR / "reports"
+WORKERS = 2
+
+
+def report_key(page, filters, version, today=None):
+    """Identify a report by what it shows.
+
+    The date is part of it: "Last Month play count" depends on it.
+    """
+    parts = [page, version, today or date.today()] + [f"{name}={value}" for name, value in sorted(asdict(filters).items())]
+    return hashlib.sha256("\0".join(map(str, parts)).encode()).hexdigest()[:24]
+
+
+def describe_filters(filters):
+    dates = "all dates"
+    if filters.start or filters.end:
+        dates = f"{filters.start or '...'} to {filters.end or '...'}"
+    return f"User: {filters.user}   Organization: {filters.org}   Device: {filters.device}   Dates: {dates}"
+
+
+def _latin1(text):
+    # The built-in PDF fonts only cover latin-1
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def render_pdf(title, filters, kpis, charts, progress=None):
+    """Render a report and return the PDF bytes.
+
+    ``kpis`` is a list of (label, formatted value) and ``charts`` a list of
+    (title, Plotly figure). ``progress(done, total)`` is called as charts finish.
+    """
+    from fpdf import FPDF
+    import plotly.io as pio
+
+    total = len(charts) + 1
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 20)
+    pdf.cell(0, 12, _latin1(f"Liminal VR Analytics - {title}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 6, _latin1(describe_filters(filters)), new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 6, f"Generated {datetime.now():%Y-%m-%d %H:%M}", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(0, 10, "User insights", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 12)
+    for label, value in kpis:
+        pdf.cell(120, 8, _latin1(label))
+        pdf.cell(0, 8, _latin1(value), align="R", new_x="LMARGIN", new_y="NEXT")
+    if progress:
+        progress(1, total)
+
+    for done, (chart_title, figure) in enumerate(charts, start=2):
+        pdf.ln(4)
+        pdf.set_font("Helvetica", "B", 14)
+        pdf.cell(0, 10, _latin1(chart_title), new_x="LMARGIN", new_y="NEXT")
+        try:
+            image = pio.to_image(figure, format="png", width=900, height=600, scale=2)
+        except Exception as error:  # kaleido/Chrome missing or failing
+            pdf.set_font("Helvetica", "I", 10)
+            pdf.multi_cell(0, 6, _latin1(f"(Chart could not be rendered: {error})"), new_x="LMARGIN", new_y="NEXT")
+        else:
+            pdf.image(io.BytesIO(image), w=pdf.epw)
+        if progress:
+            progress(done, total)
+
+    return bytes(pdf.output())
+
+
+@dataclass
+class ReportStatus:
+    state: str  # "running", "done" or "failed"
+    progress: float = 0.0
+    pdf: bytes = None
+    error: str = None
+
+
+class ReportEngine:
+    def __init__(self, root=REPORT_DIR, workers=WORKERS):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._jobs = {}  # key -> (future, [done, total]) for reports not on disk yet
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.root / f"{key}.pdf"
+
+    def submit(self, key, render, *args):
+        """Start rendering ``render(*args, progress=...)`` unless it is done or running."""
+        with self._lock:
+            if self._path(key).exists():
+                return
+            job = self._jobs.get(key)
+            if job is not None and not (job[0].done() and job[0].exception()):
+                return
+            counter = [0, 1]
+            future = self._executor.submit(self._run, key, counter, render, args)
+            self._jobs[key] = (future, counter)
+
+    def _run(self, key, counter, render, args):
+        def progress(done, total):
+            counter[:] = [done, total]
+
+        pdf = render(*args, progress=progress)
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f"_{key}.pdf"
+        tmp.write_bytes(pdf)
+        os.replace(tmp, self._path(key))
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def status(self, key):
+        """Where a report is, or None if it was never requested."""
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is None:
+            if self._path(key).exists():
+                return ReportStatus("done", 1.0, pdf=self._path(key).read_bytes())
+            return None
+        future, (done, total) = job
+        if future.done() and future.exception() is not None:
+            return ReportStatus("failed", error=str(future.exception()))
+        if future.done():
+            return ReportStatus("done", 1.0, pdf=self._path(key).read_bytes())
+        return ReportStatus("running", done / total)
+
+
+engine = ReportEngine()
@@ -0,0 +1,206 @@
+"""Daily rollup tables built from the raw event store.
+
+Each day of raw sessions (every organization's ``org=/day=`` partition of
+that day) is summarised into one small Parquet file under ``day=``, keyed by
+(org, device, user, category, experience), plus a file of distinct-user
+sketches (see ``analytics/distinct.py``). Date-range KPIs are answered
+from these files, so their cost depends on the number of days asked for and
+not on how many sessions happened, nor on how many organizations there are.
+Rows are sorted by org in small row groups, so reading one organization's
+rollups (``read(..., org=...)``) skips the others' row groups.
+
+The builder only recomputes days whose raw files changed since the last run
+(tracked in ``_manifest.json``), so it can be re-run after every ingest.
+
+    python -m analytics.rollups
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from analytics import distinct, sketches, store
+
+ROLLUP_DIR = store.DATA_DIR / "rollups" / "daily"
+KEYS = ["org", "device", "user", "category", "experience"]
+# Every metric is additive; the histogram bins are the rating/awe sketches
+METRICS = (["sessions", "duration_us", "top_ratings", "rating_sum", "rated", "awe_sum", "awe_count"]
+           + sketches.RATING.columns + sketches.AWE.columns)
+# Bump when what is built per day changes, so existing days are rebuilt
+FORMAT = 5
+REFRESH_BATCH = 64  # changed days read and summarised together
+
+
+def summarise(table, by=()):
+    """Group one day of raw sessions into rollup rows (or several, grouped ``by`` day too)."""
+    keys = KEYS + list(by)
+    duration = pc.cast(pc.subtract(table["end"], table["start"]), pa.int64())
+    top = pc.cast(pc.fill_null(pc.greater_equal(table["rating"], 4), False), pa.int64())
+    rating = pc.cast(table["rating"], pa.int64())
+    awe = pc.cast(table["awe"], pa.int64())
+    bins = {**sketches.RATING.one_hot(table["rating"]), **sketches.AWE.one_hot(table["awe"])}
+    grouped = pa.table({
+        **{key: table[key] for key in keys},
+        "duration_us": duration,
+        "top": top,
+        "rating": rating,
+        "awe": awe,
+        **bins,
+    }).group_by(keys).aggregate([
+        ("duration_us", "count"),
+        ("duration_us", "sum"),
+        ("top", "sum"),
+        ("rating", "sum"),
+        ("rating", "count"),
+        ("awe", "sum"),
+        ("awe", "count"),
+    ] + [(column, "sum") for column in bins])
+    grouped = grouped.rename_columns(keys + METRICS)
+    # Sums of all-null columns come back null; every metric is a count or total
+    return pa.table({name: pc.fill_null(column, 0) if name in METRICS else column
+                     for name, column in zip(grouped.column_names, grouped.columns)})
+
+
+# --- INCREMENTAL BUILD ---
+def _raw_files(events_dir):
+    """Map each ``day=...`` to its raw files' [path, size, mtime] (sorted), across orgs.
+
+    Paths are relative to ``events_dir``. Size and mtime are included so a
+    file rewritten under the same name (a re-run ingest) still marks its day
+    as changed.
+    """
+    files = {}
+    if not Path(events_dir).exists():
+        return files
+    for org in os.scandir(events_dir):
+        if not (org.is_dir() and org.name.startswith("org=")):
+            continue
+        for day in os.scandir(org.path):
+            if day.is_dir() and day.name.startswith("day="):
+                files.setdefault(day.name, []).extend(
+                    [f"{org.name}/{day.name}/{f.name}", f.stat().st_size, f.stat().st_mtime_ns]
+                    for f in os.scandir(day.path)
+                )
+    return {day: sorted(names) for day, names in files.items()}
+
+
+def _read_manifest(rollup_dir):
+    """The raw files each rollup day was built from ({} before the first
+    build, None if built in an older format)."""
+    try:
+        manifest = json.loads((Path(rollup_dir) / "_manifest.json").read_text())
+    except FileNotFoundError:
+        return {}
+    return manifest["days"] if manifest.get("format") == FORMAT else None
+
+
+def _write_atomic(table, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name("_" + path.name)  # "_" files are ignored by dataset discovery
+    pq.write_table(table, tmp, row_group_size=store.ROW_GROUP_SIZE)
+    os.replace(tmp, path)
+
+
+def _split(table):
+    """Yield (day partition, its rows without day, sorted by org) of a summary of several days."""
+    table = table.sort_by([("day", "ascending"), ("org", "ascending"), ("device", "ascending")])
+    # Both sorted by day, so each group's count is the length of its slice
+    runs = table.group_by("day").aggregate([([], "count_all")]).sort_by("day")
+    rows = table.drop_columns(["day"])
+    offset = 0
+    for day, size in zip(*(runs[column].to_pylist() for column in ("day", "count_all"))):
+        yield store.day_partition(day), rows.slice(offset, size)
+        offset += size
+
+
+def _changed(manifest, raw):
+    return sorted(day for day, names in raw.items() if manifest.get(day) != names)
+
+
+def refresh(events_dir=store.EVENTS_DIR, rollup_dir=ROLLUP_DIR, sketch_dir=distinct.SKETCH_DIR):
+    """Rebuild the rollups for every changed day. Returns the refreshed days."""
+    rollup_dir, sketch_dir = Path(rollup_dir), Path(sketch_dir)
+    manifest = _read_manifest(rollup_dir)
+    if manifest is None:
+        # Built in an older format (or layout): start over
+        shutil.rmtree(rollup_dir, ignore_errors=True)
+        shutil.rmtree(sketch_dir, ignore_errors=True)
+        manifest = {}
+    raw = _raw_files(events_dir)
+    changed = _changed(manifest, raw)
+
+    # Days are read and summarised in batches and the summaries split back
+    # into one file per day. ``org`` and ``day`` come from the raw paths;
+    # ``org`` stays a column, ``day`` only the path.
+    for lo in range(0, len(changed), REFRESH_BATCH):
+        batch = changed[lo:lo + REFRESH_BATCH]
+        files = [str(Path(events_dir) / name) for day in batch for name, _, _ in raw[day]]
+        table = ds.dataset(files, format="parquet", schema=store.EVENT_SCHEMA.append(pa.field("day", pa.date32())),
+                           partitioning=store.PARTITIONING, partition_base_dir=str(events_dir)).to_table(
+            columns=KEYS + ["day", "start", "end", "rating", "awe"]
+        )
+        written = set()
+        for day, rows in _split(summarise(table, by=["day"])):
+            _write_atomic(rows, rollup_dir / day / "rollup.parquet")
+            written.add(day)
+        for day, rows in _split(distinct.summarise(table, by=["day"])):
+            _write_atomic(rows, sketch_dir / day / "users.parquet")
+        for day in batch:
+            if day not in written:  # no sessions left in it
+                (rollup_dir / day / "rollup.parquet").unlink(missing_ok=True)
+                (sketch_dir / day / "users.parquet").unlink(missing_ok=True)
+            manifest[day] = raw[day]
+
+    # Days that disappeared from the raw store disappear from the rollups too
+    removed = set(manifest) - set(raw)
+    for day in removed:
+        (rollup_dir / day / "rollup.parquet").unlink(missing_ok=True)
+        (sketch_dir / day / "users.parquet").unlink(missing_ok=True)
+        del manifest[day]
+
+    if changed or removed:
+        rollup_dir.mkdir(parents=True, exist_ok=True)
+        tmp = rollup_dir / "_manifest.json.tmp"
+        tmp.write_text(json.dumps({"format": FORMAT, "days": manifest}, sort_keys=True))
+        os.replace(tmp, rollup_dir / "_manifest.json")
+    return changed
+
+
+# --- QUERIES ---
+def open_rollups(rollup_dir=ROLLUP_DIR):
+    """The daily rollups as a dataset, or None before the first build."""
+    if not any(Path(rollup_dir).glob("day=*/rollup.parquet")):
+        return None
+    return ds.dataset(str(rollup_dir), format="parquet", partitioning=store.DAY_PARTITIONING)
+
+
+def read(columns, rollup_dir=ROLLUP_DIR, org=None, filter=None):
+    """The rollup rows' ``columns`` (only ``org``'s when given), or None before the first build."""
+    dataset = open_rollups(rollup_dir)
+    if dataset is None:
+        return None
+    if org is not None:
+        filter = ds.field("org") == org if filter is None else filter & (ds.field("org") == org)
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def kpis_from_totals(sums):
+    sessions = sums["sessions"]
+    return {
+        "play_count": sessions,
+        "avg_minutes": sums["duration_us"] / sessions / 60_000_000 if sessions else 0.0,
+        "top_ratings": sums["top_ratings"],
+        # count/mean/p25/median/p75/p90, or None when nobody answered
+        "rating": sketches.RATING.summary(sums, "rating_sum"),
+        "awe": sketches.AWE.summary(sums, "awe_sum"),
+    }
+
+
+if __name__ == "__main__":
+    days = refresh()
+    print(f"Refreshed {len(days)} day(s) of rollups in {ROLLUP_DIR}")
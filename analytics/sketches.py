@@ -0,0 +1,61 @@
+"""Mergeable summaries of the rating-type answers (enjoyability and awe).
+
+Both answers are small whole numbers (rating 1-5, awe 0-100), so the sketch
+is a fixed-bin histogram: one count column per bin in the daily rollups.
+Histograms of any set of days/orgs/devices/users merge by adding the
+columns, like the other rollup metrics, so medians and percentiles for any
+filter selection come from the prefix-sum index without touching raw
+sessions.
+
+Error bound: rating quantiles are exact. Awe is kept in 5-point bins and
+quantiles are interpolated inside a bin, so they are within 5 points of the
+exact value; the mean is exact (from the ``awe_sum`` column).
+"""
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+QUANTILES = {"p25": 0.25, "median": 0.5, "p75": 0.75, "p90": 0.9}
+
+
+class Histogram:
+    def __init__(self, name, low, high, width=1):
+        self.name = name
+        self.low = low
+        self.width = width
+        self.bins = (high - low) // width + (1 if width == 1 else 0)
+        # e.g. rating_1 ... rating_5, awe_0 (0-4) ... awe_95 (95-100)
+        self.columns = [f"{name}_{low + i * width}" for i in range(self.bins)]
+
+    def one_hot(self, values):
+        """Per-bin 0/1 int64 arrays for an Arrow array of answers (nulls count nowhere)."""
+        index = pc.divide(pc.subtract(pc.cast(values, pa.int64()), self.low), self.width)
+        index = pc.min_element_wise(index, self.bins - 1)  # the top value joins the last bin
+        return {column: pc.cast(pc.fill_null(pc.equal(index, i), False), pa.int64())
+                for i, column in enumerate(self.columns)}
+
+    def summary(self, sums, total_column=None):
+        """Count, mean and quantiles from summed rollup metrics (None without answers)."""
+        counts = np.array([sums[column] for column in self.columns], dtype=np.int64)
+        count = int(counts.sum())
+        if count == 0:
+            return None
+        result = {"count": count}
+        if total_column:
+            result["mean"] = sums[total_column] / count
+        cumulative = counts.cumsum()
+        for label, q in QUANTILES.items():
+            result[label] = self._quantile(counts, cumulative, q * count)
+        return result
+
+    def _quantile(self, counts, cumulative, rank):
+        i = min(int(np.searchsorted(cumulative, rank, "left")), self.bins - 1)
+        if self.width == 1:
+            return self.low + i  # discrete answers: the nearest-rank value
+        before = cumulative[i] - counts[i]
+        inside = (rank - before) / counts[i] if counts[i] else 0.0
+        return float(self.low + (i + inside) * self.width)
+
+
+RATING = Histogram("rating", 1, 5)
+AWE = Histogram("awe", 0, 100, width=5)
@@ -0,0 +1,260 @@
+"""Columnar store for VR session events.
+
+Sessions are kept as Parquet files partitioned by organization and day
+(``events/org=<org>/day=YYYY-MM-DD/``) so that every aggregation is a
+vectorized Arrow compute call instead of a Python loop over rows.
+
+Each organization's files are in their own directory: a session scoped to
+one organization opens only that directory (``open_dataset(org=...)``), so
+its queries never list or read another organization's files. Survey answers
+are stored the same way, under the organization of their session.
+
+Stores written before the organization level existed (``events/day=...``)
+are moved over with ``python -m analytics.store --migrate``.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# --- LOCATIONS ---
+# LIMINAL_DATA_DIR lets a deployment keep its data outside the code checkout.
+DATA_DIR = Path(os.environ.get("LIMINAL_DATA_DIR", Path(__file__).resolve().parent.parent / "data"))
+EVENTS_DIR = DATA_DIR / "events"
+SURVEYS_DIR = DATA_DIR / "surveys"
+
+# --- SCHEMA ---
+# One row per VR session. Parquet dictionary-encodes the repeated text columns
+# on disk; they stay plain strings in Arrow so that filters on them can be
+# checked against row-group statistics.
+EVENT_SCHEMA = pa.schema([
+    ("session_id", pa.string()),
+    ("user", pa.string()),
+    ("org", pa.string()),
+    ("device", pa.string()),
+    ("experience", pa.string()),
+    ("category", pa.string()),
+    ("start", pa.timestamp("us")),
+    ("end", pa.timestamp("us")),
+    ("rating", pa.int8()),  # 1-5 enjoyability, null when the survey was skipped
+    ("awe", pa.int8()),  # 0-100 awe intensity slider, null when skipped (added later, see OPTIONAL_COLUMNS)
+])
+
+# Columns added after data was first written. Older files and exports
+# without them read as null.
+OPTIONAL_COLUMNS = {"awe"}
+
+# One row per mood a user ticked in the survey before ("pre") or after
+# ("post") a session. Joined to the sessions by session_id.
+SURVEY_SCHEMA = pa.schema([
+    ("session_id", pa.string()),
+    ("org", pa.string()),  # the session's organization (see attach_orgs)
+    ("phase", pa.string()),  # "pre" or "post"
+    ("mood", pa.string()),
+    ("answered_at", pa.timestamp("us")),
+])
+
+# The experience categories, in the order the pages list them
+CATEGORIES = ("Calm", "Energy", "Awe", "Pain Relief", "Focus", "Sleep")
+
+PARTITIONING = ds.partitioning(pa.schema([("org", pa.string()), ("day", pa.date32())]), flavor="hive")
+# Derived tables (rollups, sketches) are small: one file per day, every org in it
+DAY_PARTITIONING = ds.partitioning(pa.schema([("day", pa.date32())]), flavor="hive")
+SORT_ORDER = ["org", "day", "device", "user", "start"]
+SURVEY_SORT_ORDER = ["org", "day", "session_id", "phase"]
+ROW_GROUP_SIZE = 16_384
+MAX_PARTITIONS = 100_000  # org/day directories one write may touch
+
+
+def data_version(data_dir=DATA_DIR):
+    """Return a token that changes every time new events are written."""
+    try:
+        return (Path(data_dir) / "VERSION").read_text().strip()
+    except FileNotFoundError:
+        return "0"
+
+
+def bump_version(data_dir=DATA_DIR):
+    Path(data_dir).mkdir(parents=True, exist_ok=True)
+    (Path(data_dir) / "VERSION").write_text(str(time.time_ns()))
+
+
+def to_event_table(data, schema=EVENT_SCHEMA):
+    """Convert a DataFrame (or Arrow table) to a store schema (sessions by default)."""
+    if not isinstance(data, pa.Table):
+        data = pa.Table.from_pandas(data, preserve_index=False)
+    for name in OPTIONAL_COLUMNS & set(schema.names) - set(data.column_names):
+        data = data.append_column(name, pa.nulls(data.num_rows, schema.field(name).type))
+    return data.select(schema.names).cast(schema)
+
+
+def _write_partitioned(table, root, time_column, sort_order, basename):
+    if table.num_rows == 0:
+        return
+    day = pc.cast(table[time_column], pa.date32())
+    table = table.append_column("day", day)
+    # Sorting inside each day keeps every row group to a narrow range of the
+    # filter columns, so the min/max statistics let filtered reads skip most of them.
+    table = table.sort_by([(column, "ascending") for column in sort_order])
+    # A fixed basename makes a re-run overwrite its own files instead of
+    # adding duplicates; without one every call appends new files.
+    basename = basename or f"part-{uuid.uuid4().hex}"
+    pq.write_to_dataset(
+        table,
+        root_path=str(root),
+        partitioning=PARTITIONING,
+        basename_template=f"{basename}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        min_rows_per_group=ROW_GROUP_SIZE,
+        max_rows_per_group=ROW_GROUP_SIZE,
+        # Every org/day pair is a partition; a large batch touches thousands
+        max_partitions=MAX_PARTITIONS,
+    )
+    bump_version(Path(root).parent)
+
+
+def write_events(data, root=EVENTS_DIR, basename=None):
+    """Append sessions to the store, one Parquet file per touched day."""
+    _write_partitioned(to_event_table(data), root, "start", SORT_ORDER, basename)
+
+
+def write_surveys(data, root=SURVEYS_DIR, basename=None):
+    """Append mood survey answers to the store, partitioned by org and the day answered.
+
+    Every answer needs its session's ``org`` (see ``attach_orgs``).
+    """
+    _write_partitioned(to_event_table(data, SURVEY_SCHEMA), root, "answered_at", SURVEY_SORT_ORDER, basename)
+
+
+def org_dir(root, org):
+    """The directory holding one organization's partitions under ``root``."""
+    return Path(root) / PARTITIONING.format(ds.field("org") == org)[0]
+
+
+def day_partition(day):
+    """The ``day=...`` path of one derived-table partition, relative to its root."""
+    return DAY_PARTITIONING.format(ds.field("day") == day)[0]
+
+
+def open_partitioned(root, schema=None, org=None):
+    """Open an org/day partitioned directory as a lazy dataset (None if empty).
+
+    With ``org`` only that organization's directory is listed; its ``org``
+    column still comes from the path.
+    """
+    directory = Path(root) if org is None else org_dir(root, org)
+    if not directory.exists():
+        return None
+    return ds.dataset(str(directory), format="parquet", partitioning=PARTITIONING,
+                      partition_base_dir=str(root), schema=schema)
+
+
+def open_dataset(root=EVENTS_DIR, schema=EVENT_SCHEMA, org=None):
+    """Open the event store (or ``root`` with ``schema``) as a lazy Arrow dataset.
+
+    Nothing is read yet. The schema is given rather than inferred, so files
+    written before a column was added still read (as null). ``org`` limits
+    it to one organization's files.
+    """
+    return open_partitioned(root, schema.append(pa.field("day", pa.date32())), org)
+
+
+# --- SURVEY ORGANIZATIONS ---
+def attach_orgs(answers, root=EVENTS_DIR):
+    """Add each answer's session organization as ``org`` (null when the session is unknown).
+
+    Answers are given within a day of their session, so only the sessions of
+    the days answered (and the days before and after: a pre-session answer
+    given just before midnight belongs to the next day's session) are looked up.
+    """
+    if "org" in answers.column_names:
+        answers = answers.drop_columns(["org"])
+    dataset = open_dataset(root)
+    if dataset is None or answers.num_rows == 0:
+        return answers.append_column("org", pa.nulls(answers.num_rows, pa.string()))
+    days = pc.cast(answers["answered_at"], pa.date32())
+    first, last = pc.min(days).as_py() - timedelta(days=1), pc.max(days).as_py() + timedelta(days=1)
+    sessions = dataset.to_table(
+        columns=["session_id", "org"],
+        filter=(ds.field("day") >= first) & (ds.field("day") <= last)
+        & ds.field("session_id").isin(pc.unique(answers["session_id"])),
+    )
+    # Row order is kept, so the org is taken by position rather than joined
+    position = pc.index_in(answers["session_id"], value_set=sessions["session_id"])
+    return answers.append_column("org", sessions["org"].take(position))
+
+
+# --- MIGRATION ---
+def _legacy_days(root):
+    return sorted(p for p in Path(root).glob("day=*") if p.is_dir())
+
+
+def migrate(data_dir=DATA_DIR):
+    """Move a store from the old ``day=`` layout to ``org=/day=`` (sessions first).
+
+    Survey answers are only moved once every one of them has a known
+    session. Otherwise the unmatched answers are written to
+    ``rejects/migrate-surveys.jsonl``, the old survey directories are left
+    as they are and ValueError is raised; run it again after ingesting the
+    missing sessions (the sessions already moved stay moved).
+
+    Returns the number of (sessions, answers) moved.
+    """
+    data_dir = Path(data_dir)
+    events_dir, surveys_dir = data_dir / "events", data_dir / "surveys"
+    sessions = 0
+    for day in _legacy_days(events_dir):
+        table = ds.dataset(str(day), format="parquet", schema=EVENT_SCHEMA).to_table()
+        write_events(table, events_dir, basename=f"migrated-{day.name}")
+        shutil.rmtree(day)
+        sessions += table.num_rows
+
+    legacy_survey_schema = pa.schema([field for field in SURVEY_SCHEMA if field.name != "org"])
+
+    def legacy_answers(day):
+        return attach_orgs(ds.dataset(str(day), format="parquet", schema=legacy_survey_schema).to_table(), events_dir)
+
+    # 1. Check every answer first, so nothing is deleted while one is unmatched
+    unmatched = []
+    for day in _legacy_days(surveys_dir):
+        answers = legacy_answers(day)
+        unmatched.extend(answers.filter(pc.is_null(answers["org"])).drop_columns(["org"]).to_pylist())
+    if unmatched:
+        rejects_path = data_dir / "rejects" / "migrate-surveys.jsonl"
+        rejects_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(rejects_path, "w", encoding="utf-8") as rejects:
+            for record in unmatched:
+                rejects.write(json.dumps({"error": "unknown session", "record": record}, default=str) + "\n")
+        raise ValueError(f"{len(unmatched):,} survey answers have no known session (see {rejects_path}); "
+                         "the surveys were not moved")
+
+    # 2. Move them
+    answers_moved = 0
+    for day in _legacy_days(surveys_dir):
+        answers = legacy_answers(day)
+        write_surveys(answers, surveys_dir, basename=f"migrated-{day.name}")
+        shutil.rmtree(day)
+        answers_moved += answers.num_rows
+    return sessions, answers_moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance of the event store.")
+    parser.add_argument("--migrate", action="store_true", help="move a day= store to the org=/day= layout")
+    args = parser.parse_args()
+    if args.migrate:
+        try:
+            sessions, answers = migrate()
+        except ValueError as error:
+            raise SystemExit(f"Migration stopped: {error}")
+        print(f"Moved {sessions:,} sessions and {answers:,} survey answers to org=/day= partitions")
+        print("Run `python -m analytics.rollups` to rebuild the rollups.")
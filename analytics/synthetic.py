@@ -0,0 +1,244 @@
+"""Synthetic sessions and mood surveys for demos and benchmarks.
+
+    python -m analytics.synthetic --sessions 1e6
+    python -m analytics.synthetic --sessions 1e8 --seed 7 --end 2025-09-30 --data-dir /srv/liminal-demo
+
+Generates realistic-looking data (no patient data involved) straight into
+the dashboard's store, then refreshes the rollups:
+
+- organizations of different sizes, each with its own devices and users
+  (a few heavy users per org)
+- sessions spread over ``days`` with weekly and yearly seasonality and the
+  category mix of the dashboard's Category Preferences chart
+- per-experience enjoyability ratings and awe answers (some skipped)
+- pre/post mood surveys for a share of sessions, shifted towards positive
+  moods after the session
+
+Everything is vectorized with NumPy and written in chunks of whole days, so
+memory stays bounded by ``chunk_rows``. The output depends only on the
+configuration: the same seed and settings (including ``end``, which
+defaults to today) always give the same rows.
+"""
+import argparse
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analytics import moods, rollups, store
+
+# The shares of the dashboard's Category Preferences chart
+CATEGORY_MIX = {"Energy": 34, "Awe": 26, "Calm": 18, "Sleep": 13, "Focus": 5, "Pain Relief": 4}
+EXPERIENCES = {
+    "Calm": ["Aureole Hypnosis", "Still Lake", "Forest Breath"],
+    "Energy": ["Cyber Punch", "Neon Run", "Drum Circle"],
+    "Awe": ["Samsara", "Deep Ocean", "Northern Lights"],
+    "Pain Relief": ["Aureole Relief", "Warm Current"],
+    "Focus": ["Rhythmic Flow", "Zen Garden"],
+    "Sleep": ["Retreat", "Night Sky"],
+}
+SESSION_MINUTES = {"Calm": 15, "Energy": 10, "Awe": 12, "Pain Relief": 20, "Focus": 18, "Sleep": 30}  # medians
+AWE_LEVEL = {"Awe": 75}  # typical awe answer; other categories use 50
+MAX_MOODS = 3  # moods ticked per survey (1 to 3)
+
+
+@dataclass
+class Config:
+    sessions: int = 1_000_000
+    seed: int = 0
+    days: int = 365
+    end: date = None  # last day (default: today)
+    orgs: int = 12
+    devices_per_org: int = 25
+    users_per_org: int = 200
+    category_mix: dict = field(default_factory=lambda: dict(CATEGORY_MIX))
+    weekly: float = 0.4  # weekend drop (0 = none)
+    yearly: float = 0.2  # amplitude of the yearly cycle (busiest in winter)
+    survey_rate: float = 0.3  # share of sessions with pre/post mood surveys
+    rating_rate: float = 0.8  # share of sessions with an enjoyability rating
+    awe_rate: float = 0.6  # share of sessions with an awe answer
+    chunk_rows: int = 1_000_000
+
+
+class _World:
+    """The fixed parts of the dataset (names, org sizes, experience quality)."""
+
+    def __init__(self, config):
+        rng = np.random.default_rng([config.seed, 0])
+        self.orgs = pa.array([f"Org {i + 1:03d}" for i in range(config.orgs)])
+        self.org_weights = _normalise(1 / np.arange(1, config.orgs + 1) ** 0.8)
+        self.devices = pa.array([f"Headset {i + 1:05d}" for i in range(config.orgs * config.devices_per_org)])
+        self.users = pa.array([f"user{i + 1:06d}" for i in range(config.orgs * config.users_per_org)])
+
+        self.categories = [c for c in store.CATEGORIES if config.category_mix.get(c, 0) > 0]
+        self.category_weights = _normalise([config.category_mix[c] for c in self.categories])
+        self.category_names = pa.array(self.categories)
+        names = [EXPERIENCES[c] for c in self.categories]
+        self.experiences = pa.array([name for group in names for name in group])
+        self.experience_count = np.array([len(group) for group in names])
+        self.experience_offset = np.concatenate([[0], np.cumsum(self.experience_count)[:-1]])
+        self.experience_quality = rng.normal(3.8, 0.4, len(self.experiences))  # mean rating
+        self.experience_awe = rng.normal(0, 8, len(self.experiences))
+        self.minutes = np.log([SESSION_MINUTES[c] for c in self.categories])
+        self.awe_level = np.array([AWE_LEVEL.get(c, 50) for c in self.categories], dtype=np.float64)
+
+        self.moods = pa.array(moods.POSITIVE_MOODS + moods.NEGATIVE_MOODS)
+        positive = np.array([m in moods.POSITIVE_MOODS for m in self.moods.to_pylist()])
+        self.pre_logits = np.log(np.where(positive, 1.0, 2.0))
+        self.post_logits = np.log(np.where(positive, 3.0, 0.8))
+
+
+def _normalise(weights):
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def daily_counts(config):
+    """(first day, sessions per day) with the weekly and yearly seasonality."""
+    end = config.end or date.today()
+    first = end - timedelta(days=config.days - 1)
+    days = np.arange(np.datetime64(first), np.datetime64(end) + 1)
+    weekday = (days.astype(np.int64) + 3) % 7  # 0 = Monday
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(np.int64)
+    weights = np.where(weekday >= 5, 1 - config.weekly, 1.0)
+    weights = weights * (1 + config.yearly * np.cos(2 * np.pi * (day_of_year - 15) / 365.25))
+    rng = np.random.default_rng([config.seed, 1])
+    return first, rng.multinomial(config.sessions, _normalise(weights))
+
+
+def _chunks(counts, chunk_rows):
+    """Split the days into runs of whole days of about ``chunk_rows`` sessions."""
+    start, rows = 0, 0
+    for day, count in enumerate(counts):
+        rows += count
+        if rows >= chunk_rows:
+            yield start, day + 1
+            start, rows = day + 1, 0
+    if start < len(counts):
+        yield start, len(counts)
+
+
+def sessions_chunk(world, config, first, counts, offset, chunk):
+    """One chunk of sessions as an Arrow table in the event schema."""
+    rng = np.random.default_rng([config.seed, 2, chunk])
+    day = np.repeat(np.arange(len(counts)), counts)
+    n = len(day)
+
+    org = rng.choice(len(world.orgs), n, p=world.org_weights)
+    device = org * config.devices_per_org + rng.integers(0, config.devices_per_org, n)
+    # Squaring a uniform draw makes a few users per org much more active
+    user = org * config.users_per_org + (rng.random(n) ** 2 * config.users_per_org).astype(np.int64)
+    category = rng.choice(len(world.categories), n, p=world.category_weights)
+    experience = world.experience_offset[category] + (rng.random(n) * world.experience_count[category]).astype(np.int64)
+
+    seconds = np.clip(rng.normal(15 * 3600, 3.5 * 3600, n), 6 * 3600, 23.5 * 3600).astype(np.int64)
+    start = (np.datetime64(first, "us") + day.astype("timedelta64[D]") + seconds.astype("timedelta64[s]"))
+    minutes = np.clip(rng.lognormal(world.minutes[category], 0.4), 1, 120)
+    end = start + (minutes * 60).astype("timedelta64[s]")
+
+    rating = np.clip(np.rint(rng.normal(world.experience_quality[experience], 0.9)), 1, 5).astype(np.int8)
+    awe = np.clip(rng.normal(world.awe_level[category] + world.experience_awe[experience], 15), 0, 100).astype(np.int8)
+    session_id = pc.binary_join_element_wise(f"s{config.seed}-", pa.array(np.arange(offset, offset + n)).cast(pa.string()), "")
+
+    table = pa.table({
+        "session_id": session_id,
+        "user": world.users.take(pa.array(user)),
+        "org": world.orgs.take(pa.array(org)),
+        "device": world.devices.take(pa.array(device)),
+        "experience": world.experiences.take(pa.array(experience)),
+        "category": world.category_names.take(pa.array(category)),
+        "start": pa.array(start, pa.timestamp("us")),
+        "end": pa.array(end, pa.timestamp("us")),
+        "rating": pa.array(rating, mask=rng.random(n) >= config.rating_rate),
+        "awe": pa.array(awe, mask=rng.random(n) >= config.awe_rate),
+    })
+    return table, rng
+
+
+def surveys_chunk(world, config, sessions, rng):
+    """Pre/post mood surveys for a share of the chunk's sessions."""
+    surveyed = np.flatnonzero(rng.random(sessions.num_rows) < config.survey_rate)
+    parts = []
+    for phase, logits, column, shift in (("pre", world.pre_logits, "start", -2), ("post", world.post_logits, "end", 2)):
+        # Gumbel top-k: 1-3 different moods per survey, drawn without replacement
+        scores = logits + rng.gumbel(size=(len(surveyed), len(logits)))
+        top = np.argsort(-scores, axis=1)[:, :MAX_MOODS]
+        ticked = np.arange(MAX_MOODS) < rng.integers(1, MAX_MOODS + 1, len(surveyed))[:, None]
+        rows = np.repeat(surveyed, ticked.sum(axis=1))
+        times = sessions[column].to_numpy()[rows] + np.timedelta64(shift * 60, "s")
+        parts.append(pa.table({
+            "session_id": sessions["session_id"].take(pa.array(rows)),
+            "org": sessions["org"].take(pa.array(rows)),
+            "phase": pa.array(np.full(len(rows), phase)),
+            "mood": world.moods.take(pa.array(top[ticked])),
+            "answered_at": pa.array(times, pa.timestamp("us")),
+        }))
+    return pa.concat_tables(parts)
+
+
+def generate(config, data_dir=None, progress=print):
+    """Write the dataset to the store (``data_dir`` or the default) and refresh the rollups."""
+    data_dir = Path(data_dir) if data_dir else store.DATA_DIR
+    events_dir, surveys_dir = data_dir / "events", data_dir / "surveys"
+    world = _World(config)
+    first, counts = daily_counts(config)
+
+    started = time.perf_counter()
+    stats = {"sessions": 0, "survey_answers": 0, "chunks": 0}
+    for chunk, (lo, hi) in enumerate(_chunks(counts, config.chunk_rows)):
+        sessions, rng = sessions_chunk(world, config, first + timedelta(days=lo), counts[lo:hi], stats["sessions"], chunk)
+        answers = surveys_chunk(world, config, sessions, rng)
+        # Fixed names: generating the same config again overwrites, not duplicates
+        store.write_events(sessions, events_dir, basename=f"syn-{config.seed}-{chunk:05d}")
+        store.write_surveys(answers, surveys_dir, basename=f"syn-{config.seed}-{chunk:05d}")
+        stats["sessions"] += sessions.num_rows
+        stats["survey_answers"] += answers.num_rows
+        stats["chunks"] += 1
+        if progress:
+            progress(f"  {stats['sessions']:,} / {config.sessions:,} sessions "
+                     f"({time.perf_counter() - started:.0f}s)")
+
+    rollups.refresh(events_dir, data_dir / "rollups" / "daily", data_dir / "rollups" / "users")
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset into the store.")
+    parser.add_argument("--sessions", type=float, default=Config.sessions, help="number of sessions (e.g. 1e8)")
+    parser.add_argument("--seed", type=int, default=Config.seed)
+    parser.add_argument("--days", type=int, default=Config.days)
+    parser.add_argument("--end", type=date.fromisoformat, help="last day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--orgs", type=int, default=Config.orgs)
+    parser.add_argument("--devices-per-org", type=int, default=Config.devices_per_org)
+    parser.add_argument("--users-per-org", type=int, default=Config.users_per_org)
+    parser.add_argument("--category-mix", help='e.g. "Calm=50,Sleep=50" (default: the dashboard\'s mix)')
+    parser.add_argument("--weekly", type=float, default=Config.weekly, help="weekend drop, 0-1")
+    parser.add_argument("--yearly", type=float, default=Config.yearly, help="yearly cycle amplitude, 0-1")
+    parser.add_argument("--survey-rate", type=float, default=Config.survey_rate)
+    parser.add_argument("--chunk-rows", type=float, default=Config.chunk_rows)
+    parser.add_argument("--data-dir", help="store to write to (default: LIMINAL_DATA_DIR or data/)")
+    args = parser.parse_args(argv)
+
+    mix = dict(CATEGORY_MIX)
+    if args.category_mix:
+        mix = {name.strip(): float(share) for name, share in (part.split("=") for part in args.category_mix.split(","))}
+        unknown = set(mix) - set(store.CATEGORIES)
+        if unknown:
+            parser.error(f"unknown categories: {', '.join(sorted(unknown))}")
+    config = Config(
+        sessions=int(args.sessions), seed=args.seed, days=args.days, end=args.end, orgs=args.orgs,
+        devices_per_org=args.devices_per_org, users_per_org=args.users_per_org, category_mix=mix,
+        weekly=args.weekly, yearly=args.yearly, survey_rate=args.survey_rate, chunk_rows=int(args.chunk_rows),
+    )
+    stats = generate(config, args.data_dir)
+    print(f"Wrote {stats['sessions']:,} sessions and {stats['survey_answers']:,} survey answers "
+          f"in {stats['chunks']} chunk(s), {stats['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
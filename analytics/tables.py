@@ -0,0 +1,21 @@
+"""Server-side sorting and paging for the dashboard's tables.
+
+Only the rows of the current page are sent to the browser; ``st.dataframe``
+then scrolls them virtually, so the page stays light however large the
+catalogue gets.
+"""
+import math
+
+PAGE_SIZES = (25, 50, 100)
+
+
+def page_count(rows, page_size):
+    return max(1, math.ceil(rows / page_size))
+
+
+def sort_and_page(frame, sort_by, ascending=True, page=1, page_size=PAGE_SIZES[0]):
+    """Return the rows of one page (1-based) after sorting the whole frame."""
+    page = min(max(1, page), page_count(len(frame), page_size))
+    ordered = frame.sort_values(sort_by, ascending=ascending, kind="stable", na_position="last")
+    start = (page - 1) * page_size
+    return ordered.iloc[start:start + page_size]
@@ -0,0 +1,161 @@
+"""Local, content-addressed cache for the images the dashboard shows.
+
+Experience thumbnails and footer icons used to be loaded from i.imgur.com on
+every render, which is slow on a cold page and impossible in an air-gapped
+deployment. They are now imported once, resized to the 120 px the table uses,
+stored as ``static/thumbnails/<sha256>.webp`` and served by Streamlit at
+``/app/static/thumbnails/``. The dashboard only ever reads from this cache.
+
+The cache is capped at ``MAX_BYTES``; when it is full the least recently
+used images are evicted.
+
+    python -m analytics.thumbnails https://i.imgur.com/7Z2WJ44.png ./local.png
+    python -m analytics.thumbnails -f image_list.txt --max-mb 100
+
+Needs Pillow (only for importing, not for running the dashboard).
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+from analytics import assets
+
+THUMBNAIL_DIR = assets.STATIC_DIR / "thumbnails"
+THUMBNAIL_URL = assets.STATIC_URL + "thumbnails/"
+THUMBNAIL_WIDTH = 120
+MAX_BYTES = 256 * 1024 * 1024
+TOUCH_INTERVAL = 24 * 60 * 60  # only persist "last used" times once a day per image
+FETCH_TIMEOUT = 30
+
+
+def _is_url(source):
+    return source.startswith(("http://", "https://"))
+
+
+def _read_source(source):
+    if _is_url(source):
+        request = urllib.request.Request(source, headers={"User-Agent": "liminal-dashboard"})
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+            return response.read()
+    return Path(source).read_bytes()
+
+
+def _thumbnail(data, width=THUMBNAIL_WIDTH):
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=85, method=6)
+        return buffer.getvalue()
+
+
+class ThumbnailCache:
+    def __init__(self, root=THUMBNAIL_DIR, max_bytes=MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._index_path = self.root / "index.json"
+        self._index = None  # source -> {"file", "bytes", "used"}
+        self._index_mtime = None
+        self._lock = threading.Lock()
+
+    # --- INDEX ---
+    def _load(self):
+        try:
+            mtime = self._index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._index is None or mtime != self._index_mtime:
+            self._index = json.loads(self._index_path.read_text()) if mtime else {}
+            self._index_mtime = mtime
+        return self._index
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / "_index.json"
+        tmp.write_text(json.dumps(self._index, indent=1, sort_keys=True))
+        os.replace(tmp, self._index_path)
+        self._index_mtime = self._index_path.stat().st_mtime_ns
+
+    # --- READING (dashboard) ---
+    def url(self, source):
+        """URL of the cached thumbnail, or None if it was never imported."""
+        with self._lock:
+            entry = self._load().get(source)
+            if entry is None:
+                return None
+            now = time.time()
+            if now - entry["used"] > TOUCH_INTERVAL:
+                entry["used"] = now
+                self._save()
+            return THUMBNAIL_URL + entry["file"]
+
+    # --- WRITING (import command) ---
+    def add(self, source, data=None):
+        """Import one image (fetched or read from disk unless ``data`` is given)."""
+        thumbnail = _thumbnail(data if data is not None else _read_source(source))
+        name = hashlib.sha256(thumbnail).hexdigest() + ".webp"
+        with self._lock:
+            index = self._load()
+            self.root.mkdir(parents=True, exist_ok=True)
+            if not (self.root / name).exists():
+                (self.root / name).write_bytes(thumbnail)
+            index[source] = {"file": name, "bytes": len(thumbnail), "used": time.time()}
+            self._evict(index)
+            self._save()
+        return THUMBNAIL_URL + name
+
+    def _evict(self, index):
+        """Drop least recently used images until the files fit in ``max_bytes``."""
+        files = {}
+        for entry in index.values():
+            files[entry["file"]] = entry["bytes"]
+        total = sum(files.values())
+        for source, entry in sorted(index.items(), key=lambda item: item[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            del index[source]
+            if all(other["file"] != entry["file"] for other in index.values()):
+                (self.root / entry["file"]).unlink(missing_ok=True)
+                total -= entry["bytes"]
+
+
+cache = ThumbnailCache()
+
+
+def url(source):
+    return cache.url(source)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import images into the local thumbnail cache.")
+    parser.add_argument("sources", nargs="*", help="image URLs or local file paths")
+    parser.add_argument("-f", "--file", help="text file with one URL or path per line")
+    parser.add_argument("--max-mb", type=float, help="cache size cap in MB")
+    args = parser.parse_args(argv)
+
+    sources = list(args.sources)
+    if args.file:
+        sources += [line.strip() for line in Path(args.file).read_text().splitlines() if line.strip()]
+    if args.max_mb:
+        cache.max_bytes = int(args.max_mb * 1024 * 1024)
+
+    failed = 0
+    for source in sources:
+        try:
+            print(f"{source} -> {cache.add(source)}")
+        except Exception as error:  # keep going, report at the end
+            failed += 1
+            print(f"{source} FAILED: {error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
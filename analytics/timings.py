@@ -0,0 +1,123 @@
+"""Wall-time of the dashboard's sections and data queries.
+
+Turned on with ``LIMINAL_TIMINGS=1``. Every page section and every data
+query then records how long it took; the latest ``WINDOW`` samples of each
+are kept (for all sessions of the server process), so the p50/p95 always
+describe recent reruns. They are exported in the Prometheus text format to
+``METRICS_FILE`` (for node_exporter's textfile collector) and shown in the
+admin debug overlay (see ``shell.debug_overlay``).
+
+When timings are off, ``section`` hands back a shared no-op context manager
+and ``timed`` functions cost one attribute check per call.
+"""
+import functools
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import numpy as np
+
+from analytics import store
+
+ENABLED = os.environ.get("LIMINAL_TIMINGS") == "1"
+WINDOW = 500  # latest samples per section
+METRICS_FILE = store.DATA_DIR / "metrics" / "liminal.prom"
+EXPORT_INTERVAL = 15  # seconds between writes of the metrics file
+_OFF = nullcontext()
+
+
+class Timings:
+    def __init__(self, enabled=ENABLED, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=window))  # (kind, name) -> seconds
+        self._totals = defaultdict(lambda: [0, 0.0])  # (kind, name) -> [count, sum], since start
+        self._exported = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, seconds):
+        with self._lock:
+            self._samples[kind, name].append(seconds)
+            totals = self._totals[kind, name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    @contextmanager
+    def _timer(self, kind, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - started)
+
+    def section(self, name):
+        """``with timings.section("filters"): ...`` times a block of a page."""
+        return self._timer("section", name) if self.enabled else _OFF
+
+    def timed(self, name, kind="query"):
+        """Decorator that times every call of a function (a query by default)."""
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self._timer(kind, name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        """One row per section/query: kind, name, calls, p50 and p95 (ms) over the window."""
+        with self._lock:
+            samples = {key: np.array(values) for key, values in self._samples.items()}
+        rows = []
+        for (kind, name), values in sorted(samples.items()):
+            p50, p95 = np.percentile(values, [50, 95]) * 1000
+            rows.append({"kind": kind, "name": name, "calls": len(values),
+                         "p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1)})
+        return rows
+
+    def prometheus(self):
+        """All timings in the Prometheus text exposition format (a summary metric)."""
+        with self._lock:
+            samples = {key: np.array(values) for key, values in self._samples.items()}
+            totals = {key: tuple(value) for key, value in self._totals.items()}
+        lines = [
+            "# HELP liminal_section_seconds Wall time of page sections and data queries.",
+            "# TYPE liminal_section_seconds summary",
+        ]
+        for (kind, name), values in sorted(samples.items()):
+            labels = f'kind="{kind}",name="{name}"'
+            for quantile, value in zip(("0.5", "0.95"), np.percentile(values, [50, 95])):
+                lines.append(f'liminal_section_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+            count, total = totals[kind, name]
+            lines.append(f"liminal_section_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"liminal_section_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=METRICS_FILE, force=False):
+        """Write the metrics file, at most every ``EXPORT_INTERVAL`` seconds."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._exported < EXPORT_INTERVAL:
+                return
+            self._exported = now
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so the collector never reads a half-written file
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        partial.write_text(self.prometheus())
+        partial.replace(path)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+
+timings = Timings()
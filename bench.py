@@ -0,0 +1,214 @@
+"""Rerun-latency benchmark for every page, on synthetic data of growing size.
+
+    python bench.py                                  # 10^3, 10^4 and 10^5 events
+    python bench.py --sizes 1e3 1e6 1e8 --out perf/bench.json
+    python bench.py --baseline perf/bench.json       # exit 1 on a regression
+
+Each size runs in its own process (the store location is read at import and
+peak memory is per process) against its own dataset from
+``analytics.synthetic``, which is kept under ``--data-root`` and reused by
+later runs. Streamlit's headless ``AppTest`` then runs ``dashboard.py`` and
+every category page through the usual filter changes. For every step the JSON records:
+
+- ``seconds``: the rerun's wall time
+- ``sections``: time spent in each hot path (index builds, queries, bubble
+  layout, figures, table), measured by wrapping those functions
+- ``peak_rss_mb`` / ``arrow_peak_mb``: the process's peak memory so far
+
+With ``--baseline``, any step more than ``--tolerance`` times slower than in
+the baseline file (and slower by at least 50 ms) is reported and the exit
+status is 1, so a CI job can fail on it.
+"""
+import argparse
+import functools
+import inspect
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_SIZES = ["1e3", "1e4", "1e5"]
+DATA_ROOT = Path(tempfile.gettempdir()) / "liminal-bench"
+MIN_REGRESSION = 0.05  # seconds; smaller differences are noise
+
+
+# --- HOT PATH TIMERS ---
+def _wrap(owner, name, label, totals):
+    original = inspect.getattr_static(owner, name)
+    function = original.__func__ if isinstance(original, (classmethod, staticmethod)) else original
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            totals[label] += time.perf_counter() - started
+
+    setattr(owner, name, type(original)(timed) if isinstance(original, (classmethod, staticmethod)) else timed)
+
+
+def install_timers(totals):
+    """Time the hot paths the pages go through, per label."""
+    from analytics import bubbles, distinct, figures, rollups, tables
+    from analytics.categories import CategoryBundle
+    from analytics.entities import EntityIndex
+    from analytics.moods import MoodIndex
+    from analytics.prefix_index import PrefixIndex
+
+    hot_paths = {
+        "index builds": [(PrefixIndex, "build"), (MoodIndex, "build"), (EntityIndex, "build"),
+                         (CategoryBundle, "build_all"), (rollups, "refresh")],
+        "queries": [(PrefixIndex, "kpis"), (PrefixIndex, "daily"), (MoodIndex, "shift"),
+                    (distinct, "counts"), (CategoryBundle, "experiences")],
+        "bubble layout": [(bubbles, "layout")],
+        "figures": [(figures.FigureCache, "get")],
+        "table": [(tables, "sort_and_page")],
+    }
+    for label, targets in hot_paths.items():
+        for owner, name in targets:
+            _wrap(owner, name, label, totals)
+
+
+# --- SCENARIOS ---
+def _second_option(widget):
+    return widget.options[1] if len(widget.options) > 1 else widget.options[0]
+
+
+def dashboard_steps():
+    today = date.today()
+    return [
+        ("first load", lambda at: at),
+        ("rerun", lambda at: at),
+        ("select organization", lambda at: at.selectbox(key="org_filter").select(_second_option(at.selectbox(key="org_filter")))),
+        ("select device", lambda at: at.selectbox(key="device_filter").select(_second_option(at.selectbox(key="device_filter")))),
+        ("last 7 days", lambda at: at.date_input[0].set_value((today - timedelta(days=7), today))),
+        ("sort table", lambda at: at.selectbox(key="experiences_sort").select("Category")),
+        ("clear filters", lambda at: (at.selectbox(key="org_filter").select("All"),
+                                      at.selectbox(key="device_filter").select("All"))),
+    ]
+
+
+def category_steps(page):
+    return [
+        ("open page", lambda at: at.switch_page(page)),
+        ("select organization", lambda at: at.selectbox(key="org_filter").select(_second_option(at.selectbox(key="org_filter")))),
+    ]
+
+
+def run_worker(size, timeout):
+    """Benchmark one dataset (LIMINAL_DATA_DIR is set by the parent). Prints JSON."""
+    import pyarrow as pa
+    from streamlit.testing.v1 import AppTest
+
+    from analytics import store, synthetic
+
+    generated = None
+    if not store.EVENTS_DIR.exists():
+        generated = synthetic.generate(synthetic.Config(sessions=size), progress=None)["seconds"]
+
+    totals = defaultdict(float)
+    install_timers(totals)
+    os.chdir(ROOT)
+    at = AppTest.from_file(str(ROOT / "dashboard.py"), default_timeout=timeout)
+
+    import shell
+    steps = [("dashboard.py", step) for step in dashboard_steps()]
+    for page, _, _ in shell.NAV_LINKS[1:]:  # the category pages
+        steps += [(page, step) for step in category_steps(page)]
+
+    results = []
+    for page, (name, action) in steps:
+        totals.clear()
+        action(at)
+        started = time.perf_counter()
+        at.run()
+        seconds = time.perf_counter() - started
+        results.append({
+            "page": page,
+            "step": name,
+            "seconds": round(seconds, 4),
+            "sections": {label: round(value, 4) for label, value in sorted(totals.items())},
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "arrow_peak_mb": round(pa.default_memory_pool().max_memory() / 2**20, 1),
+            "exceptions": [e.message for e in at.exception],
+        })
+    print(json.dumps({"size": size, "generate_seconds": generated, "steps": results}))
+
+
+# --- RUNNER ---
+def compare(results, baseline, tolerance):
+    """Steps that got more than ``tolerance`` times slower than the baseline."""
+    before = {(r["size"], s["page"], s["step"]): s["seconds"] for r in baseline["results"] for s in r["steps"]}
+    slower = []
+    for result in results:
+        for step in result["steps"]:
+            old = before.get((result["size"], step["page"], step["step"]))
+            if old is not None and step["seconds"] > old * tolerance and step["seconds"] - old > MIN_REGRESSION:
+                slower.append(f"{result['size']:>11,} events  {step['page']} / {step['step']}: "
+                              f"{old:.3f}s -> {step['seconds']:.3f}s")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark page reruns on synthetic datasets.")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="events per dataset (e.g. 1e3 1e6 1e8)")
+    parser.add_argument("--data-root", type=Path, default=DATA_ROOT, help="where the datasets are generated and kept")
+    parser.add_argument("--out", type=Path, help="JSON results file (default: perf/bench-<time>.json)")
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor (default 1.5)")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per rerun")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        run_worker(args.worker, args.timeout)
+        return 0
+
+    results = []
+    for size in (int(float(s)) for s in args.sizes):
+        data_dir = args.data_root / f"events-{size}"
+        print(f"{size:,} events ({data_dir})...", flush=True)
+        process = subprocess.run(
+            [sys.executable, __file__, "--worker", str(size), "--timeout", str(args.timeout)],
+            env={**os.environ, "LIMINAL_DATA_DIR": str(data_dir)}, capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            print(process.stderr, file=sys.stderr)
+            return process.returncode
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        results.append(result)
+        for step in result["steps"]:
+            errors = f"  ERRORS: {step['exceptions']}" if step["exceptions"] else ""
+            print(f"  {step['page']:<24} {step['step']:<20} {step['seconds']:8.3f}s  "
+                  f"{step['peak_rss_mb']:8.0f} MB{errors}")
+
+    out = args.out or ROOT / "perf" / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }, indent=1))
+    print(f"Wrote {out}")
+
+    if args.baseline:
+        slower = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in slower:
+            print(f"SLOWER {line}")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
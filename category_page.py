@@ -0,0 +1,125 @@
+"""The page for one experience category, shared by pages/2_Calm.py ... 7_Sleep.py.
+
+Each category page is a two-line script that calls ``render("<category>")``,
+so the pages share this code, the shell and the warm caches instead of each
+carrying a copy.
+"""
+import streamlit as st
+
+import shell
+from analytics import figures, query, query_cache, reports
+from analytics.categories import CategoryBundle
+
+DESCRIPTIONS = {
+    "Calm": "How users engage with the experiences designed to calm and relax.",
+    "Energy": "How users engage with the experiences designed to energise.",
+    "Awe": "How users engage with the experiences designed to inspire awe.",
+    "Pain Relief": "How users engage with the experiences designed to relieve pain.",
+    "Focus": "How users engage with the experiences designed to improve focus.",
+    "Sleep": "How users engage with the experiences designed to help with sleep.",
+}
+
+
+# Every category's bundle, built from one read of the rollups the first time
+# a category page is opened, once per data version, and shared by every
+# session (like the indexes in shell.py: one over every organization for
+# staff, one per customer built from its rows only)
+@st.cache_resource(show_spinner=False, max_entries=shell.INDEX_ENTRIES)
+def get_bundles(version, org=query.ALL):
+    return CategoryBundle.build_all(org=query.Filters(org=org).scope())
+
+
+def kpi_panel(rows):
+    """The bordered KPI panel, one (icon, label, value, note) per row."""
+    _ , center_col, _ = st.columns([1, 2, 1])
+    with center_col:
+        with st.container(border=True):
+            for number, (icon, label, value, note) in enumerate(rows):
+                if number:
+                    st.divider()
+                icon_col, label_col, value_col = st.columns([1, 5, 2])
+                with icon_col:
+                    st.markdown(f"### {icon}")
+                with label_col:
+                    st.markdown(f"#### {label}")
+                    if note:
+                        st.markdown(f"_({note})_")
+                with value_col:
+                    st.markdown(f"### {value}")
+
+
+def render(category):
+    # --- PAGE CONFIG AND SIDEBAR ---
+    shell.page_setup()
+
+    # --- MAIN CONTENT ---
+    st.title(category)
+    st.markdown(DESCRIPTIONS.get(category, ""))
+    st.divider()
+
+    # --- DATA AND FILTERS ---
+    data_version = shell.data_version()
+    filters = shell.filters_bar(data_version)
+    export_clicked = shell.export_button()
+    report_slot = st.container()
+
+    bundle = get_bundles(data_version, shell.index_org())[category]
+    theme = st.context.theme.type or "dark"
+
+    # --- USER INSIGHTS ---
+    # Query results are shared by every session with the same selection
+    # (see analytics/query_cache.py)
+    st.subheader("User insights")
+    kpis = query_cache.cache.get(f"{category}.kpis", data_version, filters, bundle.kpis)
+    rating, awe = kpis["rating"], kpis["awe"]
+    report_kpis = [
+        ("Play count", f"{kpis['play_count']:,}"),
+        ("Average time using Liminal", f"{kpis['avg_minutes']:.1f} min"),
+        ("4 & 5 Enjoyability Rating", f"{kpis['top_ratings']:,}"),
+    ]
+    kpi_panel([
+        ("🎮", "Play count", report_kpis[0][1], None),
+        ("⏳", "Average time using Liminal", report_kpis[1][1], "From log in to log out"),
+        ("⭐", "4 & 5 Enjoyability Rating", report_kpis[2][1],
+         f"Median {rating['median']} of 5" if rating else None),
+        ("✨", "Awe Intensity", f"{awe['median']:.0f}%" if awe else "-", "Median answer" if awe else None),
+    ])
+    if rating:
+        report_kpis.append(("Median enjoyability (1-5)", str(rating["median"])))
+    if awe:
+        report_kpis.append(("Median awe intensity", f"{awe['median']:.0f}%"))
+
+    # --- TREND ---
+    st.divider()
+    st.markdown("<h3 style='text-align: center;'>Daily play count</h3>", unsafe_allow_html=True)
+    daily = query_cache.cache.get(f"{category}.daily", data_version, filters, bundle.daily)
+    fig_trend = figures.cache.get("trend", theme, figures.trend_chart, daily, namespace=filters.org)
+    st.plotly_chart(fig_trend, use_container_width=True)
+
+    # --- EXPERIENCES ---
+    st.divider()
+    st.markdown(f"<h3 style='text-align: center;'>{category} experiences</h3>", unsafe_allow_html=True)
+    st.dataframe(
+        query_cache.cache.get(f"{category}.experiences", data_version, filters, bundle.experiences),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "Play count": st.column_config.NumberColumn(format="%d"),
+            "Average minutes": st.column_config.NumberColumn(format="%.1f min"),
+            "Average rating": st.column_config.NumberColumn(format="%.1f ⭐"),
+        },
+    )
+
+    # --- REPORT EXPORT ---
+    report_key = reports.report_key(category, filters, data_version)
+    if export_clicked:
+        # Always the light theme's chart: the PDF is printed on white paper
+        fig_report = figures.cache.get("trend", "light", figures.trend_chart, daily, namespace=filters.org)
+        shell.request_report(report_key, reports.render_pdf, category, filters, report_kpis,
+                             [(f"Daily play count - {category}", fig_report)])
+    with report_slot:
+        shell.report_status(report_key, f"liminal-{category.lower().replace(' ', '-')}-report.pdf")
+
+    # --- LIVE MODE AND FOOTER ---
+    shell.live_refresh(data_version)
+    shell.footer()
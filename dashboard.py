@@ -1,409 +1,356 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
-
-# --- PAGE CONFIG ---
-# This is a magic Streamlit command that needs to be the first thing in your app
-st.set_page_config(
-    page_title="Liminal VR Analytics",
-    page_icon="🧠", # This is the icon that shows up in the browser tab
-    layout="wide" # This makes the page use the full width
-)
-# --- CUSTOM SIDEBAR ---
-# This code block creates the sidebar in the correct order.
-# You must copy this ENTIRE block to the top of every page file (e.g., 2_Calm.py).
-
-# 1. Hide the default Streamlit navigation
-st.markdown("""<style>
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-</style>""", unsafe_allow_html=True)
-
-# 2. Logo at the top
-st.sidebar.image("logo.png", width=200)
-
-# 3. "Analytics" header
-st.sidebar.header("Analytics")
-
-# 4. Custom navigation links
-# CHANGE: This now correctly points to your Dashboard.py file
-st.sidebar.page_link("Dashboard.py", label="General User Insights", icon="📊")
-st.sidebar.page_link("pages/2_Calm.py", label="Calm")
-st.sidebar.page_link("pages/3_Energy.py", label="Energy")
-st.sidebar.page_link("pages/4_Awe.py", label="Awe")
-st.sidebar.page_link("pages/5_Pain_Relief.py", label="Pain Relief")
-st.sidebar.page_link("pages/6_Focus.py", label="Focus")
-st.sidebar.page_link("pages/7_Sleep.py", label="Sleep")
-# Add more page links here for Energy, Awe, etc. as you create the files
-
-# 5. User Panel at the bottom
-st.sidebar.divider()
-user_panel_html = """
-<div style="font-family: Arial; font-size: 18px;">
-    <p style="font-weight: bold;">SwinUniversity</p>
-    <p>PaolaAdmin ➡️</p>
-</div>
-"""
-st.sidebar.markdown(user_panel_html, unsafe_allow_html=True)
-st.sidebar.button("Manage")
+
+import shell
+from analytics import distinct, figures, moods, reports, tables, thumbnails
+from analytics.timings import timings
+
+# --- PAGE CONFIG AND SIDEBAR ---
+# Shared by every page (see shell.py). This needs to be the first thing in your app.
+shell.page_setup()
+
 # --- MAIN CONTENT ---
 st.title("Analytics Dashboard")
 st.markdown("This dashboard provides key insights into how Liminal's VR experiences influence well-being and engagement.")
 
 st.divider() # This draws a line
 
+# --- DATA ---
+# The indexes are shared by every page and built once per data version (see shell.py)
+data_version = shell.data_version()
+
 # --- FILTERS ---
-st.subheader("Filters")
-
-# Create four columns for the filters
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    st.selectbox("Username", options=["All", "Ana", "Ben", "Chloe"])
-
-with col2:
-    st.selectbox("Organization", options=["All", "Company A", "Company B"])
-    
-with col3:
-    st.selectbox("Device ID", options=["All", "Device 1", "Device 2"])
-
-with col4:
-    # Set default dates for the date picker
-    today = datetime.now()
-    start_date = today - timedelta(days=48)
-    
-    st.date_input(
-        "Select date range",
-        (start_date, today), # Use today as the end date
-        format="YYYY/MM/DD"
-    )
-
-# Put the button below the filters
-st.button("Export Report PDF", use_container_width=True)
+# Everything below is computed for this one filter selection
+with timings.section("filters"):
+    filters = shell.filters_bar(data_version)
+
+# Put the button below the filters. The report itself is requested at the
+# end of the script, once the KPIs and charts below exist.
+export_clicked = shell.export_button()
+report_slot = st.container()
+
+
+# --- SECTIONS ---
+# Each section below is a fragment: a widget inside one (like the table's
+# sort and page controls) reruns only that section, not the whole page.
+# Each one returns what the PDF report needs from it (its charts as
+# (title, kind, builder, args), built for the report only when it is
+# exported), and is timed (also
+# when it reruns on its own) when LIMINAL_TIMINGS=1 (see analytics/timings.py).
+
+# Figures are cached per theme because the font colors depend on it
+theme = st.context.theme.type or "dark"
+
 
 # --- USER INSIGHTS ---
-st.subheader("User insights")
-
-# Here are the numbers from your design
-play_count = "2,200,000"
-avg_time = "21.8 min"
-enjoyability_rating = "500"
-last_month_count = "1,500"
-
-# Create invisible columns to center the content
-_ , center_col, _ = st.columns([1, 2, 1]) # Left space, main content, right space
-
-# Put everything inside the center column
-with center_col:
-    # Use a container with a border to group everything
-    with st.container(border=True):
-        # ROW 1
-        row1_col1, row1_col2, row1_col3 = st.columns([1, 5, 2])
-        with row1_col1:
-            st.markdown("### 🎮")
-        with row1_col2:
-            st.markdown("#### Play count")
-        with row1_col3:
-            st.markdown(f"### {play_count}")
+@st.fragment
+@timings.timed("user insights", kind="section")
+def user_insights(filters):
+    st.subheader("User insights")
+
+    # The numbers come from a prefix-sum index over the daily rollup tables, so
+    # any date range is answered with two lookups instead of a scan.
+    kpis = shell.kpis(filters, data_version)
+    play_count = f"{kpis['play_count']:,}"
+    avg_time = f"{kpis['avg_minutes']:.1f} min"
+    enjoyability_rating = f"{kpis['top_ratings']:,}"
+    last_month_count = f"{shell.kpis(filters.last_month(), data_version)['play_count']:,}"
+    unique = shell.distinct_counts(filters, data_version)
+    unique_users = f"{unique['users']:,}"
+    devices_used = f"{unique['devices']:,}"
+
+    # Create invisible columns to center the content
+    _ , center_col, _ = st.columns([1, 2, 1]) # Left space, main content, right space
+
+    # Put everything inside the center column
+    with center_col:
+        # Use a container with a border to group everything
+        with st.container(border=True):
+            # ROW 1
+            row1_col1, row1_col2, row1_col3 = st.columns([1, 5, 2])
+            with row1_col1:
+                st.markdown("### 🎮")
+            with row1_col2:
+                st.markdown("#### Play count")
+            with row1_col3:
+                st.markdown(f"### {play_count}")
+
+            st.divider()
+
+            # ROW 2
+            row2_col1, row2_col2, row2_col3 = st.columns([1, 5, 2])
+            with row2_col1:
+                st.markdown("### ⏳")
+            with row2_col2:
+                st.markdown("#### Average time using Liminal")
+                st.markdown("_(From log in to log out)_")
+            with row2_col3:
+                st.markdown(f"### {avg_time}")
+
+            st.divider()
+
+            # ROW 3
+            row3_col1, row3_col2, row3_col3 = st.columns([1, 5, 2])
+            with row3_col1:
+                st.markdown("### ⭐")
+            with row3_col2:
+                st.markdown("#### 4 & 5 Enjoyability Rating")
+                if kpis["rating"]:
+                    st.markdown(f"_(Median {kpis['rating']['median']} of 5, "
+                                f"middle half {kpis['rating']['p25']}-{kpis['rating']['p75']})_")
+            with row3_col3:
+                st.markdown(f"### {enjoyability_rating}")
+
+            st.divider()
+
+            # ROW 4
+            row4_col1, row4_col2, row4_col3 = st.columns([1, 5, 2])
+            with row4_col1:
+                st.markdown("### 👓")
+            with row4_col2:
+                st.markdown("#### Last Month play count")
+            with row4_col3:
+                st.markdown(f"### {last_month_count}")
+
+            st.divider()
+
+            # ROW 5
+            row5_col1, row5_col2, row5_col3 = st.columns([1, 5, 2])
+            with row5_col1:
+                st.markdown("### 👥")
+            with row5_col2:
+                st.markdown("#### Unique users")
+                st.markdown(f"_(Estimated, within about ±{2 * distinct.RELATIVE_ERROR:.0%})_")
+            with row5_col3:
+                st.markdown(f"### {unique_users}")
+
+            st.divider()
+
+            # ROW 6
+            row6_col1, row6_col2, row6_col3 = st.columns([1, 5, 2])
+            with row6_col1:
+                st.markdown("### 🥽")
+            with row6_col2:
+                st.markdown("#### Devices used")
+            with row6_col3:
+                st.markdown(f"### {devices_used}")
+
+    report_kpis = [("Play count", play_count), ("Average time using Liminal", avg_time),
+                   ("4 & 5 Enjoyability Rating", enjoyability_rating), ("Last Month play count", last_month_count),
+                   ("Unique users (estimated)", unique_users), ("Devices used", devices_used)]
+    if kpis["rating"]:
+        report_kpis.append(("Median enjoyability (1-5)", str(kpis["rating"]["median"])))
+    if kpis["awe"]:
+        report_kpis.append(("Median awe intensity", f"{kpis['awe']['median']:.0f}%"))
+    return report_kpis
 
-        st.divider()
 
-        # ROW 2
-        row2_col1, row2_col2, row2_col3 = st.columns([1, 5, 2])
-        with row2_col1:
-            st.markdown("### ⏳")
-        with row2_col2:
-            st.markdown("#### Average time using Liminal")
-            st.markdown("_(From log in to log out)_")
-        with row2_col3:
-            st.markdown(f"### {avg_time}")
-            
-        st.divider()
+# --- EMOTION AND MENTAL STATES SHIFTS ---
+def mood_summary(change, label, good_direction):
+    # One line of the summary, e.g. "▲ Positive Moods Increased by" / "53.9%"
+    increased = change >= 0
+    arrow = "▲" if increased else "▼"
+    color = "#2ca02c" if increased == good_direction else "#d62728"
+    word = "Increased" if increased else "Decreased"
+    left_col, right_col = st.columns(2)
+    with left_col:
+        st.markdown(f"""
+        <p style="font-size: 20px; text-align: right;">
+            <span style="color: {color};">{arrow}</span> {label} {word} by
+        </p>
+        """, unsafe_allow_html=True)
+    with right_col:
+        st.markdown(f"""
+        <p style="font-size: 20px; text-align: left; font-weight: bold;">
+            {abs(change):.1f}%
+        </p>
+        """, unsafe_allow_html=True)
+
+@st.fragment
+@timings.timed("mood bubbles", kind="section")
+def mood_shifts(filters):
+    st.divider()
+
+    # Create invisible columns to center this whole section
+    _ , center_col, _ = st.columns([1, 4, 1])
+
+    with center_col:
+        # Centered title and description
+        st.markdown("<h2 style='text-align: center;'>Emotion and mental states shifts</h2>", unsafe_allow_html=True)
+        st.markdown("<p style='text-align: center;'>The bubbles below show users' overall emotional states before and after using the Liminal Platform.</p>", unsafe_allow_html=True)
+
+        # The mood surveys answered before and after each session, counted
+        # for the sessions the filters select (only sessions with both surveys)
+        shift = shell.mood_shift(filters, data_version)
+        if shift.sessions == 0:
+            st.info("No sessions with both mood surveys for this selection.")
+            return []
+        # Calculate bubble positions (cached, see analytics/moods.py)
+        before_data = moods.with_positions(shift.before, "before", filters.org)
+        after_data = moods.with_positions(shift.after, "after", filters.org)
+
+        # Create three columns for the charts and the divider line
+        col1, mid_col, col2 = st.columns([10, 1, 10])
+
+        with col1:
+            st.subheader("Before")
+            fig_before = figures.cache.get("bubbles", theme, figures.bubble_chart, before_data, moods.MOOD_COLORS,
+                                           namespace=filters.org)
+            st.plotly_chart(fig_before, use_container_width=True)
+
+        with mid_col:
+            st.markdown("<div style='width: 2px; height: 400px; background-color: #333; margin: auto;'></div>", unsafe_allow_html=True)
+
+        with col2:
+            st.subheader("After")
+            fig_after = figures.cache.get("bubbles", theme, figures.bubble_chart, after_data, moods.MOOD_COLORS,
+                                          namespace=filters.org)
+            st.plotly_chart(fig_after, use_container_width=True)
 
-        # ROW 3
-        row3_col1, row3_col2, row3_col3 = st.columns([1, 5, 2])
-        with row3_col1:
-            st.markdown("### ⭐")
-        with row3_col2:
-            st.markdown("#### 4 & 5 Enjoyability Rating")
-        with row3_col3:
-            st.markdown(f"### {enjoyability_rating}")
-            
         st.divider()
 
-        # ROW 4
-        row4_col1, row4_col2, row4_col3 = st.columns([1, 5, 2])
-        with row4_col1:
-            st.markdown("### 👓")
-        with row4_col2:
-            st.markdown("#### Last Month play count")
-        with row4_col3:
-            st.markdown(f"### {last_month_count}")
-# --- EMOTION AND MENTAL STATES SHIFTS ---
-st.divider()
+        # New centered table for the summary stats (% change in how often
+        # positive / negative moods were ticked, after vs before)
+        if shift.positive_change is not None:
+            mood_summary(shift.positive_change, "Positive Moods", good_direction=True)
+        if shift.negative_change is not None:
+            mood_summary(shift.negative_change, "Negative Moods", good_direction=False)
+        st.caption(f"From {shift.sessions:,} sessions with both mood surveys")
 
-# We need these new libraries
-import plotly.express as px
-import circlify # Our new tool for packing circles
+    return [("Emotions before", "bubbles", figures.bubble_chart, (before_data, moods.MOOD_COLORS)),
+            ("Emotions after", "bubbles", figures.bubble_chart, (after_data, moods.MOOD_COLORS))]
 
-# Create invisible columns to center this whole section
-_ , center_col, _ = st.columns([1, 4, 1])
 
-with center_col:
-    # Centered title and description
-    st.markdown("<h2 style='text-align: center;'>Emotion and mental states shifts</h2>", unsafe_allow_html=True)
-    st.markdown("<p style='text-align: center;'>The bubbles below show users' overall emotional states before and after using the Liminal Platform.</p>", unsafe_allow_html=True)
+# --- AWE INTENSITY GAUGE ---
+@st.fragment
+@timings.timed("awe gauge", kind="section")
+def awe_gauge(filters):
+    st.divider()
 
-    # Prepare the data for the bubbles
-    before_data = pd.DataFrame({
-        'mood': ["Anxious", "Irritated", "Pain", "Bored", "Sad", "Excited", "Relax", "Cheerful", "Calm", "Focus", "Rested", "Mental vitality"],
-        'size': [30, 25, 28, 22, 20, 10, 18, 9, 15, 8, 9, 7],
-    })
+    # 1. The median awe answer (0-100) for the selection, merged from the
+    # per-day histograms in the rollups (see analytics/sketches.py)
+    awe = shell.kpis(filters, data_version)["awe"]
+    awe_intensity = round(awe["median"]) if awe else 0
 
-    after_data = pd.DataFrame({
-        'mood': ["Calm", "Excited", "Relax", "Focus", "Cheerful", "Rested", "Mental vitality", "Anxious", "Irritated", "Pain", "Bored", "Sad"],
-        'size': [30, 28, 29, 25, 26, 24, 22, 8, 7, 9, 6, 5],
-    })
+    # 2. Get the gauge chart figure (built once per value and theme, shared by all sessions)
+    fig_gauge = figures.cache.get("gauge", theme, figures.gauge_chart, awe_intensity, namespace=filters.org)
 
-    # Calculate bubble positions using circlify
-    before_circles = circlify.circlify(before_data['size'].tolist(), show_enclosure=False)
-    after_circles = circlify.circlify(after_data['size'].tolist(), show_enclosure=False)
-
-    before_data['x'] = [c.x for c in before_circles]
-    before_data['y'] = [c.y for c in before_circles]
-    after_data['x'] = [c.x for c in after_circles]
-    after_data['y'] = [c.y for c in after_circles]
-
-    # Define the specific color for each mood
-    mood_color_map = {
-        "Calm": "#2ca02c", "Excited": "#98df8a", "Relax": "#55a630", "Cheerful": "#80b918", "Rested": "#aacc00",
-        "Anxious": "#d62728", "Irritated": "#ff6b6b", "Bored": "#c44536", "Pain": "#8d0801",
-        "Sad": "#1f77b4",
-        "Focus": "#ffc300", "Mental vitality": "#ffd60a"
-    }
-
-    # Create three columns for the charts and the divider line
-    col1, mid_col, col2 = st.columns([10, 1, 10])
-
-    with col1:
-        st.subheader("Before")
-        fig_before = px.scatter(
-            before_data, x='x', y='y', size='size', color='mood', text='mood',
-            color_discrete_map=mood_color_map,
-            size_max=60
-        )
-        fig_before.update_traces(textposition='middle center', textfont=dict(color='white', size=14))
-        # This part cleans up the chart to look like your design
-        fig_before.update_layout(
-            showlegend=False,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(visible=False),
-            # CHANGE: Added 'scaleanchor' and 'scaleratio' to make the chart a square
-            yaxis=dict(visible=False, scaleanchor="x", scaleratio=1)
-        )
-        st.plotly_chart(fig_before, use_container_width=True)
+    # 3. Display the chart in a centered column
+    _ , center_col, _ = st.columns([1, 2, 1])
+    with center_col:
+        st.plotly_chart(fig_gauge, use_container_width=True)
+        if awe:
+            st.caption(f"Median of {awe['count']:,} answers. 25th-75th percentile: {awe['p25']:.0f}-{awe['p75']:.0f}, "
+                       f"90th: {awe['p90']:.0f}, mean: {awe['mean']:.1f}")
+        else:
+            st.caption("No awe answers for this selection.")
 
-    with mid_col:
-        st.markdown("<div style='width: 2px; height: 400px; background-color: #333; margin: auto;'></div>", unsafe_allow_html=True)
+    return [("Awe Intensity", "gauge", figures.gauge_chart, (awe_intensity,))]
 
-    with col2:
-        st.subheader("After")
-        fig_after = px.scatter(
-            after_data, x='x', y='y', size='size', color='mood', text='mood',
-            color_discrete_map=mood_color_map,
-            size_max=60
-        )
-        fig_after.update_traces(textposition='middle center', textfont=dict(color='white', size=14))
-        # This part cleans up the chart to look like your design
-        fig_after.update_layout(
-            showlegend=False,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(visible=False),
-            # CHANGE: Added 'scaleanchor' and 'scaleratio' to make the chart a square
-            yaxis=dict(visible=False, scaleanchor="x", scaleratio=1)
-        )
-        st.plotly_chart(fig_after, use_container_width=True)
 
+# --- CATEGORY PREFERENCES DONUT CHART ---
+@st.fragment
+@timings.timed("category donut", kind="section")
+def category_donut():
     st.divider()
 
-    # New centered table for the summary stats
-    summary_col1, summary_col2 = st.columns(2)
-    with summary_col1:
-        st.markdown("""
-        <p style="font-size: 20px; text-align: right;">
-            <span style="color: #2ca02c;">▲</span> Positive Moods Increased by
-        </p>
-        """, unsafe_allow_html=True)
-    with summary_col2:
-        st.markdown("""
-        <p style="font-size: 20px; text-align: left; font-weight: bold;">
-            53.9%
-        </p>
-        """, unsafe_allow_html=True)
+    # 1. Prepare the data from your design
+    category_data = pd.DataFrame({
+        'Category': ['Energy', 'Awe', 'Calm', 'Sleep', 'Focus', 'Pain Relief'],
+        'Percentage': [34, 26, 18, 13, 5, 4]
+    })
 
-    summary_col3, summary_col4 = st.columns(2)
-    with summary_col3:
-        st.markdown("""
-        <p style="font-size: 20px; text-align: right;">
-            <span style="color: #d62728;">▼</span> Negative Moods Decrease by
-        </p>
-        """, unsafe_allow_html=True)
-    with summary_col4:
-        st.markdown("""
-        <p style="font-size: 20px; text-align: left; font-weight: bold;">
-            20.8%
-        </p>
-        """, unsafe_allow_html=True)
-      # --- AWE INTENSITY GAUGE ---
-st.divider()
-
-# We need to import plotly's graph objects for this chart
-import plotly.graph_objects as go
-
-# 1. Define the value for our gauge
-awe_intensity = 70
-
-# 2. Create the gauge chart figure
-fig_gauge = go.Figure(go.Indicator(
-    mode = "gauge+number",
-    value = awe_intensity,
-    number = {'suffix': "%"}, # CHANGE 1: Added a suffix to show the '%' symbol
-    domain = {'x': [0, 1], 'y': [0, 1]},
-    title = {'text': "Awe Intensity", 'font': {'size': 24}},
-    gauge = {
-        'axis': {'range': [None, 100]},
-        'bar': {'color': "#8A2BE2"}, # This bar now clearly represents the 70%
-        # CHANGE 2: Removed the confusing 'steps' for a cleaner look
-    }))
-
-fig_gauge.update_layout(
-    paper_bgcolor = "rgba(0,0,0,0)", # Makes the background transparent
-    font = {'color': "white", 'family': "Arial"}
-)
-
-# 3. Display the chart in a centered column
-_ , center_col, _ = st.columns([1, 2, 1])
-with center_col:
-    st.plotly_chart(fig_gauge, use_container_width=True)
- # --- CATEGORY PREFERENCES DONUT CHART ---
-st.divider()
-
-# 1. Prepare the data from your design
-category_data = pd.DataFrame({
-    'Category': ['Energy', 'Awe', 'Calm', 'Sleep', 'Focus', 'Pain Relief'],
-    'Percentage': [34, 26, 18, 13, 5, 4]
-})
-
-# Define the colors for each category to match the design
-category_colors = ['#f28e2b', '#AF7AC5', '#2E86C1', '#28B463', '#5DADE2', '#1E8449']
-
-# 2. Create the donut chart figure
-fig_donut = go.Figure(data=[go.Pie(
-    labels=category_data['Category'],
-    values=category_data['Percentage'],
-    hole=.6,
-    marker_colors=category_colors,
-    textinfo='percent',
-    textfont_size=16,
-    textposition='outside',
-    insidetextorientation='horizontal',
-    hovertemplate="<b>%{label}</b><br>%{percent}<extra></extra>"
-)])
-
-# 3. Update the layout to match your design
-fig_donut.update_layout(
-    # CHANGE 1: The title is now fully handled by st.markdown below
-    showlegend=True,
-    legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=1.0,
-        xanchor="center",
-        x=0.5,
-        font=dict(size=16)
-    ),
-    paper_bgcolor="rgba(0,0,0,0)",
-    font = {'color': "white", 'family': "Arial"}
-)
-
-# 4. Display the chart in a centered section
-_ , center_col, _ = st.columns([1, 4, 1])
-with center_col:
-    st.markdown("<h3 style='text-align: center;'>Category Preferences</h3>", unsafe_allow_html=True)
-    # CHANGE 2: Added a centered markdown for the subtitle to ensure perfect alignment
-    st.markdown("<p style='text-align: center;'>Where Users Spend the Most Time or User Engagement by Category</p>", unsafe_allow_html=True)
-    st.plotly_chart(fig_donut, use_container_width=True)
-# --- MOST EFFECTIVE EXPERIENCES TABLE (NEW NATIVE METHOD) ---
-st.divider()
-
-# 1. Prepare the data for the table
-table_data = pd.DataFrame({
-    "Category": ["Calm", "Energy", "Awe", "Focus", "Pain Relief", "Sleep"],
-    "Top Experience": ["Aureole Hypnosis", "Cyber Punch", "Samsara", "Rhythmic Flow", "Aureole Relief", "Retreat"],
-    "Effectiveness Score": ["4.8 ⭐", "4.7 ⭐", "4.5 ⭐", "4.1 ⭐", "4.4 ⭐", "4.5 ⭐"],
-    "Image": [
-        "https://i.imgur.com/7Z2WJ44.png",
-        "https://i.imgur.com/KDKk3sT.png",
-        "https://i.imgur.com/SztmG3z.png",
-        "https://i.imgur.com/wPzL6aY.png",
-        "https://i.imgur.com/7Z2WJ44.png",
-        "https://i.imgur.com/A4y9j2N.png"
-    ]
-})
-
-# 2. Display the section title in a centered column
-_ , center_col, _ = st.columns([1, 10, 1])
-with center_col:
-    st.markdown("<h3 style='text-align: center;'>Most Effective Experiences Per Category</h3>", unsafe_allow_html=True)
-    
-    # 3. Create a header row using columns
-    header_cols = st.columns([2, 3, 2, 2])
-    header_cols[0].markdown("**Category**")
-    header_cols[1].markdown("**Top Experience**")
-    header_cols[2].markdown("**Effectiveness Score**")
-    header_cols[3].markdown("**Image**")
-    
+    # Define the colors for each category to match the design
+    category_colors = ['#f28e2b', '#AF7AC5', '#2E86C1', '#28B463', '#5DADE2', '#1E8449']
+
+    # 2. Get the donut chart figure (cached like the others)
+    fig_donut = figures.cache.get("donut", theme, figures.donut_chart, category_data, category_colors)
+
+    # 3. Display the chart in a centered section
+    _ , center_col, _ = st.columns([1, 4, 1])
+    with center_col:
+        st.markdown("<h3 style='text-align: center;'>Category Preferences</h3>", unsafe_allow_html=True)
+        # CHANGE 2: Added a centered markdown for the subtitle to ensure perfect alignment
+        st.markdown("<p style='text-align: center;'>Where Users Spend the Most Time or User Engagement by Category</p>", unsafe_allow_html=True)
+        st.plotly_chart(fig_donut, use_container_width=True)
+
+    return [("Category Preferences", "donut", figures.donut_chart, (category_data, category_colors))]
+
+
+# --- MOST EFFECTIVE EXPERIENCES TABLE ---
+@st.fragment
+@timings.timed("experiences table", kind="section")
+def experiences_table():
     st.divider()
 
-    # 4. Loop through the data and create a row for each experience using columns
-    for index, row in table_data.iterrows():
-        row_cols = st.columns([2, 3, 2, 2])
-        row_cols[0].write(row['Category'])
-        row_cols[1].write(row['Top Experience'])
-        row_cols[2].write(row['Effectiveness Score'])
-        row_cols[3].image(row['Image'], width=120)
-        st.divider()
+    # 1. Prepare the data for the table
+    table_data = pd.DataFrame({
+        "Category": ["Calm", "Energy", "Awe", "Focus", "Pain Relief", "Sleep"],
+        "Top Experience": ["Aureole Hypnosis", "Cyber Punch", "Samsara", "Rhythmic Flow", "Aureole Relief", "Retreat"],
+        "Effectiveness Score": [4.8, 4.7, 4.5, 4.1, 4.4, 4.5],
+        "Image": [
+            "https://i.imgur.com/7Z2WJ44.png",
+            "https://i.imgur.com/KDKk3sT.png",
+            "https://i.imgur.com/SztmG3z.png",
+            "https://i.imgur.com/wPzL6aY.png",
+            "https://i.imgur.com/7Z2WJ44.png",
+            "https://i.imgur.com/A4y9j2N.png"
+        ]
+    })
+
+    # Images are served from the local thumbnail cache only (no remote fetches);
+    # run `python -m analytics.thumbnails -f thumbnails.txt` once to import them
+    table_data["Image"] = table_data["Image"].map(thumbnails.url)
+
+    # 2. Display the section title in a centered column
+    _ , center_col, _ = st.columns([1, 10, 1])
+    with center_col:
+        st.markdown("<h3 style='text-align: center;'>Most Effective Experiences Per Category</h3>", unsafe_allow_html=True)
+
+        # 3. Sorting and paging happen on the server, so only one page of rows is sent
+        sort_col, order_col, size_col, page_col = st.columns(4)
+        with sort_col:
+            sort_by = st.selectbox("Sort by", ["Effectiveness Score", "Category", "Top Experience"], key="experiences_sort")
+        with order_col:
+            order = st.selectbox("Order", ["Descending", "Ascending"], key="experiences_order")
+        with size_col:
+            page_size = st.selectbox("Rows per page", tables.PAGE_SIZES, key="experiences_page_size")
+        with page_col:
+            pages = tables.page_count(len(table_data), page_size)
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="experiences_page")
+
+        # 4. One grid for the whole page of rows (instead of a set of widgets per row)
+        st.dataframe(
+            tables.sort_and_page(table_data, sort_by, order == "Ascending", page, page_size),
+            hide_index=True,
+            use_container_width=True,
+            row_height=64,
+            column_config={
+                "Effectiveness Score": st.column_config.NumberColumn(format="%.1f ⭐"),
+                "Image": st.column_config.ImageColumn("Image", width="small"),
+            },
+        )
+
+
+report_kpis = user_insights(filters)
+report_charts = mood_shifts(filters) + awe_gauge(filters) + category_donut()
+experiences_table()
+
+# --- REPORT EXPORT ---
+# The PDF is rendered by a background worker, so reruns aren't blocked by it
+report_key = reports.report_key("dashboard", filters, data_version)
+if export_clicked:
+    # The PDF is printed on white paper, so its charts are always the light
+    # theme's (the dark theme's white labels would be invisible)
+    report_charts = [(title, figures.cache.get(kind, "light", builder, *args, namespace=filters.org))
+                     for title, kind, builder, args in report_charts]
+    shell.request_report(report_key, reports.render_pdf, "General User Insights", filters, report_kpis, report_charts)
+with report_slot:
+    shell.report_status(report_key, "liminal-insights-report.pdf")
+
+# --- LIVE MODE ---
+# On a wall display the page refreshes itself when new sessions arrive
+shell.live_refresh(data_version)
+
 # --- FOOTER ---
-st.divider()
-
-# Using markdown with HTML/CSS for a custom footer
-# NOTE: Replace '#' in the links and the image URLs with your actual links and images.
-footer_html = """
-<style>
-    .footer { text-align: center; padding: 2rem 0; color: #A9A9A9; }
-    .footer .logo-img { width: 120px; margin-bottom: 1rem; }
-    .footer .social-icons img { width: 24px; margin: 0 10px; }
-    .footer .footer-links a { color: #A9A9A9; text-decoration: none; margin: 0 10px; }
-</style>
-<div class="footer">
-    <img src="logo.png" class="logo-img">
-    <p>© 2025 - Liminal VR</p>
-    <div class="social-icons">
-        <a href="#"><img src="https://i.imgur.com/4z15M62.png"></a>
-        <a href="#"><img src="https://i.imgur.com/1Gj2Z2F.png"></a>
-        <a href="#"><img src="https://i.imgur.com/4z15M62.png"></a>
-        <a href="#"><img src="https://i.imgur.com/1Gj2Z2F.png"></a>
-        <a href="#"><img src="https://i.imgur.com/4z15M62.png"></a>
-    </div>
-    <div class="footer-links">
-        <a href="#">ABOUT US</a> - 
-        <a href="#">CONTACT</a> - 
-        <a href="#">TERMS OF SERVICE</a> - 
-        <a href="#">PRIVACY POLICY</a>
-    </div>
-</div>
-"""
-st.markdown(footer_html, unsafe_allow_html=True)
\ No newline at end of file
+shell.footer()
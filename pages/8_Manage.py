@@ -1 +1,125 @@
+import io
 
+import streamlit as st
+
+import shell
+from analytics import registry
+
+# --- PAGE CONFIG AND SIDEBAR ---
+# Shared by every page (see shell.py). This needs to be the first thing in your app.
+shell.page_setup()
+
+# A customer admin only manages their own organization (None: staff, all of them)
+viewer_org = shell.viewer_org()
+
+# --- MAIN CONTENT ---
+st.title("Manage")
+st.markdown("Organizations, users and headsets. Search by the start of a name, or add many at once from a CSV file.")
+
+st.divider()
+
+# What each tab lists: (kind, tab label, search label)
+LISTINGS = [
+    ("device", "🥽 Headsets", "Device ID"),
+    ("user", "👥 Users", "Username"),
+    ("org", "🏢 Organizations", "Organization"),
+]
+
+
+# --- LISTINGS ---
+# Each listing is a fragment, so paging through it doesn't rerun the page.
+# Only the rows of the current page are read from the registry (see
+# analytics/registry.py); the pages are keyset-paginated, so the page keeps
+# the "after" name of every page before it to be able to go back.
+def _reset_pages(kind):
+    st.session_state[f"{kind}_pages"] = [None]
+
+
+def _next_page(kind, after):
+    st.session_state[f"{kind}_pages"].append(after)
+
+
+def _previous_page(kind):
+    st.session_state[f"{kind}_pages"].pop()
+
+
+@st.fragment
+def listing(kind, search_label):
+    # 1. Search box and page size
+    search_col, size_col = st.columns([3, 1])
+    with search_col:
+        prefix = st.text_input(search_label, placeholder="Type to search...", key=f"{kind}_registry_search",
+                               on_change=_reset_pages, args=(kind,))
+    with size_col:
+        page_size = st.selectbox("Rows per page", registry.PAGE_SIZES, key=f"{kind}_registry_page_size",
+                                 on_change=_reset_pages, args=(kind,))
+
+    # 2. The current page
+    pages = st.session_state.setdefault(f"{kind}_pages", [None])
+    rows, next_after = registry.page(kind, prefix, pages[-1], page_size, org=viewer_org)
+    total = registry.count(kind, prefix, org=viewer_org)
+    if rows:
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+    else:
+        st.info("Nothing found." if prefix else "Nothing here yet. Import a CSV file below.")
+
+    # 3. Previous / Next
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    with prev_col:
+        st.button("← Previous", key=f"{kind}_previous", disabled=len(pages) == 1, use_container_width=True,
+                  on_click=_previous_page, args=(kind,))
+    with info_col:
+        st.caption(f"Page {len(pages)} of {max(1, -(-total // page_size)):,} ({total:,} found)")
+    with next_col:
+        st.button("Next →", key=f"{kind}_next", disabled=next_after is None, use_container_width=True,
+                  on_click=_next_page, args=(kind, next_after))
+
+
+for (kind, _, search_label), tab in zip(LISTINGS, st.tabs([label for _, label, _ in LISTINGS])):
+    with tab:
+        listing(kind, search_label)
+
+# --- BULK IMPORT ---
+# The import runs in the button's callback, before the page reruns, so the
+# listings above already show the new rows.
+def run_import():
+    uploaded = st.session_state["registry_upload"]
+    kind = st.session_state["registry_import_kind"]
+    try:
+        # The upload is read line by line and written in batches (one transaction each)
+        result = registry.import_csv(kind, io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline=""),
+                                     org=viewer_org)
+    except ValueError as error:
+        result = {"error": str(error)}
+    st.session_state["registry_import_result"] = result
+    for listed_kind, _, _ in LISTINGS:
+        _reset_pages(listed_kind)
+
+
+st.divider()
+st.subheader("Import from CSV")
+st.markdown(
+    "Rows are added, or updated when the name already exists. Organizations and users they "
+    "refer to are created too.\n\n"
+    "- Headsets: `device`, `org`, optional `model` and `user`\n"
+    "- Users: `user`, `org`, optional `email`\n"
+    "- Organizations: `org`"
+)
+labels = {kind: label for kind, label, _ in LISTINGS}
+kind_col, file_col = st.columns([1, 3])
+with kind_col:
+    st.radio("Import", list(labels), format_func=labels.get, key="registry_import_kind")
+with file_col:
+    uploaded = st.file_uploader("CSV file", type="csv", key="registry_upload")
+st.button("Import", disabled=uploaded is None, on_click=run_import)
+
+result = st.session_state.pop("registry_import_result", None)
+if result and "error" in result:
+    st.error(result["error"])
+elif result:
+    st.success(f"Imported {result['rows']:,} rows.")
+    if result["rejected"]:
+        st.warning(f"{result['rejected']:,} rows were skipped:\n\n" + "\n".join(f"- {e}" for e in result["errors"]))
+
+# --- FOOTER ---
+shell.footer()
@@ -0,0 +1,109 @@
+"""Start the dashboard with its caches already warm.
+
+    python serve.py [streamlit options]   # instead of `streamlit run dashboard.py`
+    python serve.py --import-report       # rewrite perf/import_time.txt
+
+Streamlit has no start-up hook and only runs a page when someone opens it,
+so the first visitor after a deploy used to pay for importing Plotly and
+pandas, building every index and drawing every chart. This script does that
+work first, in the same process, and then starts the Streamlit server. The
+caches it fills (``st.cache_resource``, the query, figure and bubble layout
+caches) are process-wide, so the server's pages find them warm.
+
+The import report lists the slowest modules a page imports (like
+``python -X importtime``). It is kept in git, so a change that makes start-up
+slower shows up in the diff.
+"""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+IMPORT_REPORT = ROOT / "perf" / "import_time.txt"
+# Everything the pages import before they draw anything
+PAGE_IMPORTS = "import shell, category_page; from analytics import figures, moods, tables"
+THEMES = ("dark", "light")
+REPORT_ROWS = 30
+
+
+# --- WARM-UP ---
+def warm_up():
+    """Import the heavy modules, build the indexes and draw the default views."""
+    started = time.perf_counter()
+
+    # 1. Heavy imports (Plotly, pandas, pyarrow) and the shared page code
+    import shell
+    import category_page
+    from analytics import figures, moods, query_cache
+
+    # 2. The shared indexes and every category's bundle, for the current data
+    # (the tenant's, in a single-customer deployment)
+    filters = shell.default_filters()
+    version = shell.data_version()
+    shell.get_entity_index(version, filters.org)
+    shell.get_prefix_index(version, filters.org)
+    shell.get_mood_index(version, filters.org)
+    bundles = category_page.get_bundles(version, filters.org).values()
+
+    # 3. What a new session sees first: the default filters' shared query
+    # results, bubble layouts and figures, in both themes (built exactly like
+    # the pages build them)
+    shift = shell.mood_shift(filters, version, filters.org)
+    awe = shell.kpis(filters, version, filters.org)["awe"]
+    shell.distinct_counts(filters, version, filters.org)
+    for theme in THEMES:
+        if shift.sessions:
+            for chart, distribution in (("before", shift.before), ("after", shift.after)):
+                figures.cache.get("bubbles", theme, figures.bubble_chart,
+                                  moods.with_positions(distribution, chart, filters.org), moods.MOOD_COLORS, namespace=filters.org)
+        figures.cache.get("gauge", theme, figures.gauge_chart, round(awe["median"]) if awe else 0,
+                          namespace=filters.org)
+        for bundle in bundles:
+            daily = query_cache.cache.get(f"{bundle.category}.daily", version, filters, bundle.daily)
+            figures.cache.get("trend", theme, figures.trend_chart, daily, namespace=filters.org)
+
+    print(f"Warm-up done in {time.perf_counter() - started:.1f}s (data version {version})")
+
+
+# --- IMPORT REPORT ---
+def import_report():
+    """Import the page modules in a fresh interpreter and summarise -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PAGE_IMPORTS],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    modules = []  # (cumulative us, self us, module)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    # Top-level imports (no indentation) add up to the total
+    total = sum(cumulative for cumulative, _, name in modules if not name.startswith("  "))
+    lines = [
+        f"Import time of the page modules: {total / 1000:.0f} ms",
+        f"Generated by `python serve.py --import-report` ({PAGE_IMPORTS})",
+        "",
+        f"{'cumulative ms':>13}  {'self ms':>8}  module",
+    ]
+    for cumulative, self_us, name in sorted(modules, reverse=True)[:REPORT_ROWS]:
+        lines.append(f"{cumulative / 1000:>13.1f}  {self_us / 1000:>8.1f}  {name.strip()}")
+    IMPORT_REPORT.parent.mkdir(parents=True, exist_ok=True)
+    IMPORT_REPORT.write_text("\n".join(lines) + "\n")
+    return total
+
+
+def main():
+    if sys.argv[1:2] == ["--import-report"]:
+        total = import_report()
+        print(f"Wrote {IMPORT_REPORT} ({total / 1000:.0f} ms)")
+        return
+
+    warm_up()
+    from streamlit.web import cli
+    sys.argv = ["streamlit", "run", str(ROOT / "dashboard.py")] + sys.argv[1:]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
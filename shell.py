@@ -0,0 +1,378 @@
+"""The page shell shared by every page: page config, sidebar, filters and footer.
+
+Every page starts with ``shell.page_setup()`` and ends with ``shell.footer()``
+instead of carrying its own copy of this code. The data caches live here too,
+so every page shares the same warm indexes.
+"""
+import hmac
+import html
+import os
+from datetime import date, timedelta
+
+import streamlit as st
+
+from analytics import assets, distinct, query, query_cache, reports, rollups, store, thumbnails
+from analytics.entities import EntityIndex
+from analytics.moods import MoodIndex
+from analytics.prefix_index import PrefixIndex
+from analytics.timings import timings
+
+# Sidebar navigation: (page file, label, icon)
+NAV_LINKS = [
+    ("dashboard.py", "General User Insights", "📊"),
+    ("pages/2_Calm.py", "Calm", None),
+    ("pages/3_Energy.py", "Energy", None),
+    ("pages/4_Awe.py", "Awe", None),
+    ("pages/5_Pain_Relief.py", "Pain Relief", None),
+    ("pages/6_Focus.py", "Focus", None),
+    ("pages/7_Sleep.py", "Sleep", None),
+]
+
+# NOTE: the HTML stays unindented, otherwise markdown renders it as a code block.
+USER_PANEL_HTML = """
+<div style="font-family: Arial; font-size: 18px;">
+    <p style="font-weight: bold;">{org}</p>
+    <p>{user} ➡️</p>
+</div>
+"""
+
+# Footer icons: (link, image). Images are served from the local thumbnail cache.
+SOCIAL_ICONS = [
+    ("#", "https://i.imgur.com/4z15M62.png"),
+    ("#", "https://i.imgur.com/1Gj2Z2F.png"),
+    ("#", "https://i.imgur.com/4z15M62.png"),
+    ("#", "https://i.imgur.com/1Gj2Z2F.png"),
+    ("#", "https://i.imgur.com/4z15M62.png"),
+]
+
+# Using markdown with HTML/CSS for a custom footer
+# NOTE: Replace '#' in the links and the image URLs with your actual links and images.
+FOOTER_HTML = """
+<style>
+    .footer { text-align: center; padding: 2rem 0; color: #A9A9A9; }
+    .footer .logo-img { width: 120px; margin-bottom: 1rem; }
+    .footer .social-icons img { width: 24px; margin: 0 10px; }
+    .footer .footer-links a { color: #A9A9A9; text-decoration: none; margin: 0 10px; }
+</style>
+<div class="footer">
+    {logo_html}
+    <p>© 2025 - Liminal VR</p>
+    <div class="social-icons">
+        {social_icons_html}
+    </div>
+    <div class="footer-links">
+        <a href="#">ABOUT US</a> - 
+        <a href="#">CONTACT</a> - 
+        <a href="#">TERMS OF SERVICE</a> - 
+        <a href="#">PRIVACY POLICY</a>
+    </div>
+</div>
+"""
+
+
+def page_setup():
+    """Page config and the custom sidebar. Must be the first thing a page calls."""
+    # --- PAGE CONFIG ---
+    st.set_page_config(
+        page_title="Liminal VR Analytics",
+        page_icon="🧠", # This is the icon that shows up in the browser tab
+        layout="wide" # This makes the page use the full width
+    )
+    # --- CUSTOM SIDEBAR ---
+    # 1. Hide the default Streamlit navigation
+    st.markdown("""<style>
+    [data-testid="stSidebarNav"] {
+        display: none;
+    }
+</style>""", unsafe_allow_html=True)
+
+    # 2. Logo at the top. The built 200 px WebP (a few KB, cacheable URL) is
+    # used when available; logo.png is the fallback before `python -m analytics.assets`.
+    st.sidebar.image(assets.url("logo.png", 200) or "logo.png", width=200)
+
+    # 3. "Analytics" header
+    st.sidebar.header("Analytics")
+
+    # 4. Custom navigation links
+    for page, label, icon in NAV_LINKS:
+        st.sidebar.page_link(page, label=label, icon=icon)
+
+    # 5. User Panel at the bottom: who is signed in, and for which organization
+    st.sidebar.divider()
+    org = viewer_org() or "All organizations"
+    user = viewer_name() or "Admin"
+    st.sidebar.markdown(USER_PANEL_HTML.replace("{org}", html.escape(org)).replace("{user}", html.escape(user)),
+                        unsafe_allow_html=True)
+    if st.sidebar.button("Manage"):
+        st.switch_page("pages/8_Manage.py")
+
+    # 6. Live mode for wall displays (open a page with ?live=1 to start in it)
+    st.sidebar.toggle("Live mode", value=st.query_params.get("live") == "1", key="live_mode",
+                      help=f"Check for new data every {LIVE_INTERVAL} seconds and refresh when it arrives.")
+
+
+def footer():
+    """The footer at the bottom of every page (and the admin's debug overlay)."""
+    with timings.section("footer"):
+        st.divider()
+
+        # The footer logo is the built 120 px variant (hidden until the assets are built)
+        logo_url = assets.url("logo.png", 120)
+        logo_html = f'<img src="{logo_url}" class="logo-img">' if logo_url else ""
+        icons = [(link, thumbnails.url(image)) for link, image in SOCIAL_ICONS]
+        social_icons_html = "".join(f'<a href="{link}"><img src="{src}"></a>' for link, src in icons if src)
+        footer_html = FOOTER_HTML.replace("{logo_html}", logo_html).replace("{social_icons_html}", social_icons_html)
+        st.markdown(footer_html, unsafe_allow_html=True)
+
+    debug_overlay()
+    timings.export()
+
+
+# --- VIEWER ---
+# The app has no login of its own: it runs behind the sign-in proxy. A
+# deployment for one customer sets LIMINAL_TENANT to its organization; a
+# shared deployment sets LIMINAL_TENANT_HEADER to the request header the
+# proxy puts the signed-in admin's organization in. With neither set the
+# viewer is Liminal staff and can see every organization.
+TENANT = os.environ.get("LIMINAL_TENANT", "")
+TENANT_HEADER = os.environ.get("LIMINAL_TENANT_HEADER", "")
+USER_HEADER = os.environ.get("LIMINAL_USER_HEADER", "")
+
+
+def viewer_org():
+    """The only organization this session may see, or None for staff (all of them)."""
+    if TENANT:
+        return TENANT
+    if TENANT_HEADER:
+        org = (st.context.headers.get(TENANT_HEADER) or "").strip()
+        if not org:
+            # Never fall back to every organization when the header is missing
+            st.error("Your organization could not be identified. Please sign in again.")
+            st.stop()
+        return org
+    return None
+
+
+def viewer_name():
+    return (st.context.headers.get(USER_HEADER) or "").strip() if USER_HEADER else ""
+
+
+# --- DEBUG OVERLAY ---
+# Admins open a page with ?debug=<LIMINAL_DEBUG_TOKEN> to see the section
+# timings (needs LIMINAL_TIMINGS=1, see analytics/timings.py).
+DEBUG_TOKEN = os.environ.get("LIMINAL_DEBUG_TOKEN", "")
+
+
+def is_admin():
+    given = st.query_params.get("debug", "")
+    return bool(DEBUG_TOKEN) and hmac.compare_digest(given.encode(), DEBUG_TOKEN.encode())
+
+
+def debug_overlay():
+    """p50/p95 of every section and query over the recent reruns (admins only)."""
+    if not (timings.enabled and is_admin()):
+        return
+    with st.sidebar.expander("⏱️ Timings", expanded=True):
+        rows = timings.summary()
+        if not rows:
+            st.caption("No timings yet.")
+            return
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        st.caption(f"Over the latest {timings.window} runs of each, for all sessions of this server.")
+
+
+# --- DATA ---
+# Built once per data version for the whole server (not per session, rerun or
+# page). Only the days touched by new sessions are re-rolled. Only the current
+# and the previous version are kept (a session still on the previous one
+# finishes its rerun), so a stream of new data doesn't pile up indexes.
+VERSIONS_KEPT = 2
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT)
+def refresh_rollups(version):
+    return rollups.refresh()
+
+
+# Staff use one set of indexes over every organization ("All"), which also
+# answers any organization they pick in the Filters bar. A session pinned to
+# a customer uses that customer's own set, built from its files only, so it
+# never loads another customer's rows. Sets are kept for the most recently
+# used TENANTS_KEPT organizations (and "All").
+TENANTS_KEPT = int(os.environ.get("LIMINAL_TENANTS_KEPT", "8"))
+INDEX_ENTRIES = VERSIONS_KEPT * (TENANTS_KEPT + 1)
+
+
+def index_org():
+    """Whose indexes this session uses: its customer's, or "All" for staff."""
+    return viewer_org() or query.ALL
+
+
+@st.cache_resource(show_spinner=False, max_entries=INDEX_ENTRIES)
+def get_entity_index(version, org=query.ALL):
+    return EntityIndex.build(org=query.Filters(org=org).scope())
+
+
+@st.cache_resource(show_spinner=False, max_entries=INDEX_ENTRIES)
+def get_prefix_index(version, org=query.ALL):
+    return PrefixIndex.build(org=query.Filters(org=org).scope())
+
+
+@st.cache_resource(show_spinner=False, max_entries=INDEX_ENTRIES)
+def get_mood_index(version, org=query.ALL):
+    return MoodIndex.build(org=query.Filters(org=org).scope())
+
+
+# --- SHARED QUERY RESULTS ---
+# Computed once per (data version, selection) for all sessions; concurrent
+# requests for the same selection wait for one computation (see
+# analytics/query_cache.py). Results are kept per organization and are
+# shared: don't modify them. ``org`` picks the indexes (default: index_org()).
+def kpis(filters, version, org=None):
+    index = get_prefix_index(version, org or index_org())
+    return query_cache.cache.get("kpis", version, filters, index.kpis)
+
+
+def mood_shift(filters, version, org=None):
+    index = get_mood_index(version, org or index_org())
+    return query_cache.cache.get("mood_shift", version, filters, index.shift)
+
+
+# Distinct users are estimated from HyperLogLog sketches (see analytics/distinct.py)
+def distinct_counts(filters, version, org=None):
+    org = org or index_org()
+    entity_index, prefix_index = get_entity_index(version, org), get_prefix_index(version, org)
+    return query_cache.cache.get("distinct_counts", version, filters,
+                                 lambda selection: distinct.counts(selection, entity_index, prefix_index))
+
+
+def data_version():
+    """The current data version, with the rollups brought up to date for it."""
+    version = store.data_version()
+    refresh_rollups(version)
+    return version
+
+
+# --- FILTERS ---
+def _filter_options(entity_index, kind, key, typed, **selection):
+    # Only the top matches for what the admin typed are sent to the browser.
+    # The current choice is kept in the list so it doesn't reset on rerun.
+    matches = entity_index.search(kind, typed, **selection)
+    current = st.session_state.get(key, "All")
+    if current != "All" and current not in matches and entity_index.contains(kind, current, **selection):
+        matches = [current] + matches
+    return ["All"] + matches
+
+
+DEFAULT_DAYS = 48  # the date picker starts on the last 48 days
+
+
+def default_filters():
+    """The selection a new session starts with (what the warm-up precomputes)."""
+    today = date.today()
+    return query.Filters(org=TENANT or query.ALL, start=today - timedelta(days=DEFAULT_DAYS), end=today)
+
+
+def filters_bar(version):
+    """The Filters bar. Returns the selection as a ``query.Filters``."""
+    st.subheader("Filters")
+    tenant = viewer_org()
+    entity_index = get_entity_index(version, index_org())
+
+    # Create four columns for the filters
+    col1, col2, col3, col4 = st.columns(4)
+
+    # The columns are filled org -> device -> user so each list can be narrowed
+    # by the choices before it.
+    with col2:
+        if tenant:
+            # A customer only ever sees their own organization
+            st.text_input("Organization", placeholder="Type to search...", key="org_search", disabled=True)
+            organization = st.selectbox("Organization", options=[tenant], key="org_filter",
+                                        label_visibility="collapsed", disabled=True)
+        else:
+            org_search = st.text_input("Organization", placeholder="Type to search...", key="org_search")
+            organization = st.selectbox("Organization", options=_filter_options(entity_index, "org", "org_filter", org_search),
+                                        key="org_filter", label_visibility="collapsed")
+
+    with col3:
+        device_search = st.text_input("Device ID", placeholder="Type to search...", key="device_search")
+        device_id = st.selectbox("Device ID", options=_filter_options(entity_index, "device", "device_filter", device_search,
+                                                                      org=organization),
+                                 key="device_filter", label_visibility="collapsed")
+
+    with col1:
+        user_search = st.text_input("Username", placeholder="Type to search...", key="user_search")
+        username = st.selectbox("Username", options=_filter_options(entity_index, "user", "user_filter", user_search,
+                                                                    org=organization, device=device_id),
+                                key="user_filter", label_visibility="collapsed")
+
+    with col4:
+        # Set default dates for the date picker
+        default = default_filters()
+        date_range = st.date_input(
+            "Select date range",
+            (default.start, default.end), # Ends today
+            format="YYYY/MM/DD"
+        )
+
+    range_start, range_end = query.date_range(date_range)
+    return query.Filters(username, tenant or organization, device_id, range_start, range_end)
+
+
+# --- LIVE MODE ---
+LIVE_INTERVAL = 5  # seconds between checks for new data
+
+
+def live_refresh(version):
+    """In live mode, refresh the page when the data changes (call at the end of a page).
+
+    Each check only reads the data version; the sections are rendered again
+    (mostly from the caches) only when it is different from ``version``.
+    """
+    if st.session_state.get("live_mode"):
+        _watch_data_version(version)
+
+
+@st.fragment(run_every=LIVE_INTERVAL)
+def _watch_data_version(version):
+    if store.data_version() != version:
+        st.rerun()
+
+
+# --- REPORT EXPORT ---
+def export_button():
+    """The "Export Report PDF" button that sits below the filters."""
+    return st.button("Export Report PDF", use_container_width=True)
+
+
+def request_report(key, render, *args):
+    """Start rendering a report in the background and remember it for this session."""
+    reports.engine.submit(key, render, *args)
+    st.session_state.setdefault("requested_reports", set()).add(key)
+
+
+def report_status(key, file_name):
+    """Progress bar while the report renders, then a download button."""
+    if key not in st.session_state.get("requested_reports", set()):
+        return
+    status = reports.engine.status(key)
+    if status is None:
+        return
+    if status.state == "done":
+        st.download_button("Download report PDF", data=status.pdf, file_name=file_name,
+                           mime="application/pdf", use_container_width=True)
+    elif status.state == "failed":
+        st.error(f"The report could not be created: {status.error}")
+    else:
+        _report_progress(key)
+
+
+@st.fragment(run_every=1)
+def _report_progress(key):
+    # Only this fragment reruns while the report renders; once it is finished
+    # the whole page reruns once to swap the progress bar for the download.
+    status = reports.engine.status(key)
+    if status is None or status.state != "running":
+        st.rerun()
+    st.progress(status.progress, text="Rendering report...")